@@ -147,6 +147,54 @@ MEDIA_ROOT = os.environ.get("MEDIA_ROOT", BASE_DIR / "media")
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ==========================================
+# Upload Handling
+# ==========================================
+# Uploads are hashed and size/type checked while they stream in (see apps/core/uploadhandlers.py)
+FILE_UPLOAD_HANDLERS = [
+    "apps.core.uploadhandlers.HashingMemoryFileUploadHandler",
+    "apps.core.uploadhandlers.HashingTemporaryFileUploadHandler",
+]
+UPLOAD_MAX_FILE_SIZE_MB = int(os.environ.get("UPLOAD_MAX_FILE_SIZE_MB", "10"))
+# Fields with their own cap: lead exports are streamed row by row, so they can be much larger
+UPLOAD_FIELD_MAX_SIZE_MB = {
+    "companies_file": int(os.environ.get("COMPANIES_FILE_MAX_SIZE_MB", "100")),
+}
+# The apply page uploads each file once; later actions refer to it by handle for this long.
+# Run `python manage.py purge_staged_uploads` periodically to delete expired files.
+UPLOAD_STAGING_TTL_MINUTES = int(os.environ.get("UPLOAD_STAGING_TTL_MINUTES", "60"))
+UPLOAD_BLOCKED_CONTENT_TYPES = {
+    "application/x-msdownload",
+    "application/x-executable",
+    "application/x-mach-binary",
+}
+
+# ==========================================
+# Guest Extraction Limits
+# ==========================================
+# /guest/test/ is public, so its extraction runs in a capped child process (see apps/core/sandbox.py)
+GUEST_EXTRACT_TIMEOUT_SECONDS = int(os.environ.get("GUEST_EXTRACT_TIMEOUT_SECONDS", "20"))
+GUEST_EXTRACT_CPU_SECONDS = int(os.environ.get("GUEST_EXTRACT_CPU_SECONDS", "15"))
+GUEST_EXTRACT_MAX_MEMORY_MB = int(os.environ.get("GUEST_EXTRACT_MAX_MEMORY_MB", "512"))
+GUEST_EXTRACT_MAX_PDF_PAGES = int(os.environ.get("GUEST_EXTRACT_MAX_PDF_PAGES", "50"))
+GUEST_EXTRACT_MAX_PER_IP = int(os.environ.get("GUEST_EXTRACT_MAX_PER_IP", "1"))
+GUEST_EXTRACT_MAX_CONCURRENT = int(os.environ.get("GUEST_EXTRACT_MAX_CONCURRENT", "4"))
+
+# ==========================================
+# Shared Drive Account Limits
+# ==========================================
+# Every user's Drive calls share one service account, so they're scheduled (see apps/core/fairshare.py):
+# a global cap, a per-user cap, and slots kept free for apply-page reads over background uploads.
+# Limits span processes only with a shared CACHES backend (e.g. Redis); the default is per process.
+DRIVE_MAX_CONCURRENT = int(os.environ.get("DRIVE_MAX_CONCURRENT", "8"))
+DRIVE_MAX_CONCURRENT_PER_USER = int(os.environ.get("DRIVE_MAX_CONCURRENT_PER_USER", "2"))
+DRIVE_INTERACTIVE_RESERVED = int(os.environ.get("DRIVE_INTERACTIVE_RESERVED", "2"))
+# A call that waited this long for a slot runs anyway, once any rate-limit backoff has passed
+DRIVE_SLOT_TIMEOUT_SECONDS = int(os.environ.get("DRIVE_SLOT_TIMEOUT_SECONDS", "30"))
+# Retries of rate-limited (403 userRateLimitExceeded / 429) and 5xx calls, with shared exponential backoff
+DRIVE_MAX_RETRIES = int(os.environ.get("DRIVE_MAX_RETRIES", "4"))
+DRIVE_MAX_BACKOFF_SECONDS = int(os.environ.get("DRIVE_MAX_BACKOFF_SECONDS", "32"))
+
 # ==========================================
 # Authentication & OAuth Settings
 # ==========================================
@@ -158,6 +206,56 @@ LOGOUT_REDIRECT_URL = 'core:landing'
 GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET")
 
+# ==========================================
+# Email Transport Settings
+# ==========================================
+# "gmail_api" sends one HTTPS request per message; "smtp" keeps a pooled
+# XOAUTH2 connection to smtp.gmail.com open for the whole campaign.
+EMAIL_TRANSPORT = os.environ.get("EMAIL_TRANSPORT", "gmail_api")
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.environ.get("SMTP_USE_TLS", "True").lower() == "true"
+SMTP_USE_XOAUTH2 = os.environ.get("SMTP_USE_XOAUTH2", "True").lower() == "true"
+SMTP_TIMEOUT_SECONDS = int(os.environ.get("SMTP_TIMEOUT_SECONDS", "30"))
+SMTP_MESSAGES_PER_CONNECTION = int(os.environ.get("SMTP_MESSAGES_PER_CONNECTION", "90"))
+# Gmail API batching: messages per batch request, size cap per batch, retries for rate-limited sends
+GMAIL_BATCH_SIZE = int(os.environ.get("GMAIL_BATCH_SIZE", "20"))
+GMAIL_BATCH_MAX_BYTES = int(os.environ.get("GMAIL_BATCH_MAX_BYTES", str(20 * 1024 * 1024)))
+GMAIL_BATCH_MAX_RETRIES = int(os.environ.get("GMAIL_BATCH_MAX_RETRIES", "3"))
+# Pause between sends (or batches) in a campaign loop
+EMAIL_SEND_DELAY_SECONDS = float(os.environ.get("EMAIL_SEND_DELAY_SECONDS", "1"))
+# How campaign files reach recipients: "attach" mails them with every message, "link"
+# shares the archived copy once and puts its link in the body, "auto" links only
+# files larger than ATTACH_INLINE_MAX_MB.
+EMAIL_ATTACHMENT_MODE = os.environ.get("EMAIL_ATTACHMENT_MODE", "attach")
+ATTACH_INLINE_MAX_MB = float(os.environ.get("ATTACH_INLINE_MAX_MB", "2"))
+# Messages one Gmail account may send per day (500 for consumer accounts, 2000 for Workspace).
+# Leads beyond what is left today are scheduled for later days; run
+# `python manage.py send_scheduled_campaigns` from cron every few minutes to deliver them.
+GMAIL_DAILY_SEND_LIMIT = int(os.environ.get("GMAIL_DAILY_SEND_LIMIT", "500"))
+# Pre-send attachment optimization, a per-campaign option (this sets the apply form's default).
+# Images are scaled to ATTACHMENT_IMAGE_MAX_PX on the long side, images inside PDFs to
+# ATTACHMENT_PDF_IMAGE_DPI, and re-encoded as JPEG at ATTACHMENT_JPEG_QUALITY when that is smaller.
+OPTIMIZE_ATTACHMENTS = os.environ.get("OPTIMIZE_ATTACHMENTS", "False").lower() == "true"
+ATTACHMENT_IMAGE_MAX_PX = int(os.environ.get("ATTACHMENT_IMAGE_MAX_PX", "2000"))
+ATTACHMENT_PDF_IMAGE_DPI = int(os.environ.get("ATTACHMENT_PDF_IMAGE_DPI", "150"))
+ATTACHMENT_JPEG_QUALITY = int(os.environ.get("ATTACHMENT_JPEG_QUALITY", "80"))
+
+# ==========================================
+# Campaign API Settings
+# ==========================================
+# Leads one API campaign may hold, and how many are inserted per bulk INSERT while streaming
+API_MAX_LEADS_PER_CAMPAIGN = int(os.environ.get("API_MAX_LEADS_PER_CAMPAIGN", "100000"))
+API_LEAD_BATCH_SIZE = int(os.environ.get("API_LEAD_BATCH_SIZE", "1000"))
+
+# ==========================================
+# Campaign Storage Settings
+# ==========================================
+# "google_drive" archives campaigns to GOOGLE_DRIVE_FOLDER_ID; "local" writes them
+# under CAMPAIGN_STORAGE_ROOT (a local directory or mounted volume).
+CAMPAIGN_STORAGE = os.environ.get("CAMPAIGN_STORAGE", "google_drive")
+CAMPAIGN_STORAGE_ROOT = os.environ.get("CAMPAIGN_STORAGE_ROOT", os.path.join(BASE_DIR, "campaign_storage"))
+
 # ==========================================
 # Google Drive Settings
 # ==========================================
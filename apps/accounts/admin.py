@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import GoogleOAuthProfile
+from .models import GoogleOAuthProfile, ApiToken
 
 @admin.register(GoogleOAuthProfile)
 class GoogleOAuthProfileAdmin(admin.ModelAdmin):
     # Display the related user and check if we successfully captured a refresh token
-    list_display = ('get_user_email', 'has_refresh_token')
+    list_display = ('get_user_email', 'has_refresh_token', 'token_expiry')
     search_fields = ('user__email',)
 
     def get_user_email(self, obj):
@@ -16,4 +16,11 @@ class GoogleOAuthProfileAdmin(admin.ModelAdmin):
         # Returns a nice boolean checkmark in the admin panel
         return bool(obj.refresh_token)
     has_refresh_token.boolean = True
-    has_refresh_token.short_description = 'Has Refresh Token?'
\ No newline at end of file
+    has_refresh_token.short_description = 'Has Refresh Token?'
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    # Keys are only shown once, by `manage.py create_api_token`; the admin can list and revoke
+    list_display = ('user', 'name', 'created_at', 'last_used_at')
+    search_fields = ('user__email', 'name')
+    readonly_fields = ('key_hash',)
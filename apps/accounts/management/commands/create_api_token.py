@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = "Creates a campaign API token for a user and prints its key (shown only once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("email")
+        parser.add_argument("--name", default="", help="A label to recognise the token by in the admin.")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email__iexact=options["email"]).first()
+        if user is None:
+            raise CommandError(f"No user with email {options['email']}.")
+        _, key = ApiToken.issue(user, name=options["name"])
+        self.stdout.write(key)
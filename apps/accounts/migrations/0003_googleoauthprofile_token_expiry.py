@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_googleoauthprofile_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googleoauthprofile',
+            name='token_expiry',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
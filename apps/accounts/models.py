@@ -1,8 +1,25 @@
-from django.db import models
+import hashlib
+import secrets
+import threading
+from datetime import timedelta, timezone as dt_timezone
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from google.oauth2.credentials import Credentials
+from django.utils import timezone
 from django.conf import settings
 
+# Refresh a little before Google's one-hour expiry so a send never starts on a dying token
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Per-process cache of live Credentials, keyed by user id
+_credentials_cache = {}
+_credentials_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _get_user_lock(user_id):
+    with _locks_guard:
+        return _credentials_locks.setdefault(user_id, threading.Lock())
+
 
 class GoogleOAuthProfile(models.Model):
     # Links this profile to the standard Django User
@@ -11,16 +28,114 @@ class GoogleOAuthProfile(models.Model):
     # We use TextField because Google tokens can be quite long
     access_token = models.TextField()
     refresh_token = models.TextField(null=True, blank=True)
+    token_expiry = models.DateTimeField(null=True, blank=True)
 
-    def get_credentials(self):
+    def token_is_fresh(self):
+        """True if the stored access token is still good for at least the refresh margin."""
+        return bool(self.token_expiry) and self.token_expiry - TOKEN_REFRESH_MARGIN > timezone.now()
+
+    def build_credentials(self):
         """Converts the stored text tokens back into a Google Credentials object."""
+        # Imported here so loading the model at worker boot doesn't pull in google-auth
+        from google.oauth2.credentials import Credentials
+
+        expiry = None
+        if self.token_expiry:
+            # google-auth compares against naive UTC datetimes
+            expiry = timezone.make_naive(self.token_expiry, dt_timezone.utc)
         return Credentials(
             token=self.access_token,
             refresh_token=self.refresh_token,
             token_uri="https://oauth2.googleapis.com/token",
             client_id=settings.GOOGLE_CLIENT_ID,
             client_secret=settings.GOOGLE_CLIENT_SECRET,
+            expiry=expiry,
         )
 
+    def get_credentials(self):
+        """
+        Returns live credentials, refreshing (and saving) the access token when it is
+        about to expire. Only one thread per process and one worker per user hits the
+        token endpoint at a time; everyone else reuses the saved result.
+        """
+        cached = _credentials_cache.get(self.user_id)
+        if cached is not None and self._credentials_fresh(cached):
+            return cached
+
+        with _get_user_lock(self.user_id):
+            # Another thread may have refreshed while we waited
+            cached = _credentials_cache.get(self.user_id)
+            if cached is not None and self._credentials_fresh(cached):
+                return cached
+
+            if not self.refresh_token:
+                return self.build_credentials()
+
+            with transaction.atomic():
+                # Row lock serializes refreshes across workers and nodes
+                profile = GoogleOAuthProfile.objects.select_for_update().get(pk=self.pk)
+                if not profile.token_is_fresh():
+                    creds = profile.build_credentials()
+                    try:
+                        from google.auth.transport.requests import Request
+                        creds.refresh(Request())
+                    except Exception as e:
+                        print(f"Error refreshing Google token for {self.user_id}: {e}")
+                        return creds
+
+                    profile.access_token = creds.token
+                    profile.token_expiry = timezone.make_aware(creds.expiry, dt_timezone.utc) if creds.expiry else None
+                    profile.save(update_fields=['access_token', 'token_expiry'])
+
+            self.access_token = profile.access_token
+            self.token_expiry = profile.token_expiry
+            creds = self.build_credentials()
+            _credentials_cache[self.user_id] = creds
+            return creds
+
+    def forget_cached_credentials(self):
+        """Drops this user's cached credentials, e.g. after a fresh login."""
+        _credentials_cache.pop(self.user_id, None)
+
+    @staticmethod
+    def _credentials_fresh(creds):
+        if creds.expiry is None:
+            return False
+        return creds.expiry - TOKEN_REFRESH_MARGIN > timezone.now().replace(tzinfo=None)
+
+    def __str__(self):
+        return f"OAuth Profile for {self.user.email}"
+
+
+class ApiToken(models.Model):
+    """
+    A bearer token for the campaign API. Only the SHA-256 of the key is
+    stored; the key itself is shown once, when the token is created.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user, name=""):
+        """Creates a token and returns (token, key)."""
+        key = secrets.token_urlsafe(32)
+        return cls.objects.create(user=user, name=name, key_hash=cls.hash_key(key)), key
+
+    @classmethod
+    def authenticate(cls, key):
+        """Returns the token's user, or None for an unknown key."""
+        token = cls.objects.select_related('user').filter(key_hash=cls.hash_key(key)).first()
+        if token is None or not token.user.is_active:
+            return None
+        cls.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+        return token.user
+
     def __str__(self):
-        return f"OAuth Profile for {self.user.email}"
\ No newline at end of file
+        return f"API token {self.name or self.pk} for {self.user.email}"
@@ -1,5 +1,7 @@
 import os
 import requests
+from datetime import timedelta
+from django.utils import timezone
 from django.shortcuts import redirect
 from django.conf import settings
 from django.contrib.auth import login
@@ -14,6 +16,9 @@ def google_login(request):
     """Step 1: Redirect user to Google's consent screen."""
     # We are asking for basic profile info PLUS permission to send emails
     scopes = "openid email profile https://www.googleapis.com/auth/gmail.send"
+    if settings.EMAIL_TRANSPORT == "smtp":
+        # SMTP XOAUTH2 only accepts tokens with the full mail scope
+        scopes += " https://mail.google.com/"
 
     auth_url = (
         f"https://accounts.google.com/o/oauth2/v2/auth?"
@@ -45,6 +50,7 @@ def google_callback(request):
     access_token = token_response.get('access_token')
     refresh_token = token_response.get('refresh_token')  # Only appears if prompt=consent
     id_token = token_response.get('id_token')
+    expires_in = token_response.get('expires_in')
 
     if not access_token:
         return redirect('core:landing')
@@ -63,10 +69,12 @@ def google_callback(request):
     # Get or create the OAuth Profile and save the tokens!
     profile, profile_created = GoogleOAuthProfile.objects.get_or_create(user=user)
     profile.access_token = access_token
+    profile.token_expiry = timezone.now() + timedelta(seconds=int(expires_in)) if expires_in else None
     # Only overwrite refresh_token if Google actually sent a new one
     if refresh_token:
         profile.refresh_token = refresh_token
     profile.save()
+    profile.forget_cached_credentials()
 
     # Log the user in and redirect to the Apply page
     login(request, user)
@@ -1,3 +1,56 @@
 from django.contrib import admin
+from .models import (
+    SendProgress, CampaignCounter, DailySendCount, DailySendStats, DomainSendStats, ScheduledCampaign, ScheduledLead
+)
 
-# Register your models here.
+@admin.register(SendProgress)
+class SendProgressAdmin(admin.ModelAdmin):
+    list_display = ('user', 'status', 'sent', 'failed', 'total', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('user__email',)
+
+@admin.register(CampaignCounter)
+class CampaignCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'storage', 'last_number', 'latest_number', 'updated_at')
+    list_filter = ('storage',)
+    search_fields = ('user__email',)
+
+@admin.register(DailySendCount)
+class DailySendCountAdmin(admin.ModelAdmin):
+    list_display = ('user', 'day', 'count')
+    list_filter = ('day',)
+    search_fields = ('user__email',)
+
+class RollupAdmin(admin.ModelAdmin):
+    """Rollups are only written by the send loop; the admin browses them (CSV: /analytics/export/)."""
+    date_hierarchy = 'day'
+    search_fields = ('user__email',)
+    list_select_related = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(DailySendStats)
+class DailySendStatsAdmin(RollupAdmin):
+    list_display = ('day', 'user', 'sent', 'failed')
+    ordering = ('-day', '-sent')
+
+@admin.register(DomainSendStats)
+class DomainSendStatsAdmin(RollupAdmin):
+    list_display = ('day', 'domain', 'user', 'sent', 'failed')
+    search_fields = ('user__email', 'domain')
+    ordering = ('-day', '-sent')
+
+class ScheduledLeadInline(admin.TabularInline):
+    model = ScheduledLead
+    extra = 0
+    fields = ('email', 'company_name', 'send_after', 'status', 'sent_at')
+
+@admin.register(ScheduledCampaign)
+class ScheduledCampaignAdmin(admin.ModelAdmin):
+    list_display = ('user', 'subject', 'recipient_timezone', 'window_start_hour', 'window_end_hour', 'created_at')
+    search_fields = ('user__email', 'subject')
+    inlines = [ScheduledLeadInline]
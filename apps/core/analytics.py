@@ -0,0 +1,141 @@
+import csv
+import itertools
+from collections import Counter
+from datetime import timedelta
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+
+from .models import DailySendStats, DomainSendStats, SendProgress
+
+# Longest range the export accepts, so one request can't walk years of rollups
+MAX_EXPORT_DAYS = 366
+
+# ==========================================
+# 1. Incremental Rollups
+# ==========================================
+
+def email_domain(email):
+    return email.rsplit('@', 1)[-1].lower()
+
+def record_send_stats(user_id, sent_leads, failed_leads, day=None):
+    """
+    Adds one sent group to the per-user and per-domain daily rollups. Called
+    by the send loop after each group, so reports never need the lead lists.
+    """
+    if not sent_leads and not failed_leads:
+        return
+    from .scheduler import quota_day
+    day = day or quota_day()
+
+    sent = Counter(email_domain(lead["email"]) for lead in sent_leads)
+    failed = Counter(email_domain(lead["email"]) for lead in failed_leads)
+
+    updated = DailySendStats.objects.filter(user_id=user_id, day=day).update(
+        sent=F('sent') + len(sent_leads), failed=F('failed') + len(failed_leads))
+    if not updated:
+        try:
+            with transaction.atomic():
+                DailySendStats.objects.create(user_id=user_id, day=day, sent=len(sent_leads), failed=len(failed_leads))
+        except IntegrityError:
+            # Another worker created today's row first
+            DailySendStats.objects.filter(user_id=user_id, day=day).update(
+                sent=F('sent') + len(sent_leads), failed=F('failed') + len(failed_leads))
+
+    # Three queries per group however many domains it touches: create missing rows,
+    # then one UPDATE ... CASE with relative increments, which concurrent senders can't lose
+    domains = set(sent) | set(failed)
+    with transaction.atomic():
+        DomainSendStats.objects.bulk_create(
+            [DomainSendStats(user_id=user_id, day=day, domain=domain) for domain in domains], ignore_conflicts=True
+        )
+        rows = list(DomainSendStats.objects.filter(user_id=user_id, day=day, domain__in=domains).only('pk', 'domain'))
+        for row in rows:
+            row.sent = F('sent') + sent[row.domain]
+            row.failed = F('failed') + failed[row.domain]
+        DomainSendStats.objects.bulk_update(rows, ['sent', 'failed'])
+
+# ==========================================
+# 2. Reports & Export
+# ==========================================
+
+def report_range(start=None, end=None, days=7):
+    """Inclusive (start, end) dates; defaults to the last `days` quota days."""
+    from .scheduler import quota_day
+    end = end or quota_day()
+    start = start or end - timedelta(days=days - 1)
+    return start, end
+
+def daily_report(start, end):
+    return (DailySendStats.objects.filter(day__range=(start, end))
+            .order_by('day', 'user__email').values_list('day', 'user__email', 'sent', 'failed'))
+
+def domain_report(start, end):
+    """Totals per user and recipient domain over the range, busiest first."""
+    return (DomainSendStats.objects.filter(day__range=(start, end))
+            .values('user__email', 'domain').annotate(total_sent=Sum('sent'), total_failed=Sum('failed'))
+            .order_by('-total_sent', 'user__email', 'domain')
+            .values_list('user__email', 'domain', 'total_sent', 'total_failed'))
+
+def campaign_report(start, end):
+    # SendProgress already is the per-campaign rollup: one counter row per send
+    return (SendProgress.objects.filter(started_at__date__range=(start, end))
+            .order_by('started_at').values_list('id', 'user__email', 'status', 'total', 'sent', 'failed',
+                                                'started_at', 'finished_at'))
+
+REPORTS = {
+    "daily": (("day", "user", "sent", "failed"), daily_report),
+    "domains": (("user", "domain", "sent", "failed"), domain_report),
+    "campaigns": (("campaign", "user", "status", "total", "sent", "failed", "started_at", "finished_at"), campaign_report),
+}
+
+def parse_day(value):
+    """A YYYY-MM-DD query parameter as a date, None when absent; ValueError when malformed."""
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
+
+
+class Echo:
+    """A write-only file that hands each CSV line back to the streaming response."""
+    def write(self, value):
+        return value
+
+
+@staff_member_required
+def analytics_export_view(request):
+    """
+    Streams one report as CSV: ?report=daily|domains|campaigns, with either
+    ?days=N (default 7) or ?start=YYYY-MM-DD&end=YYYY-MM-DD. Reads only the
+    rollup tables, so it stays fast however many emails have been sent.
+    """
+    report = request.GET.get("report", "daily")
+    if report not in REPORTS:
+        return JsonResponse({"error": f"Unknown report. Use one of: {', '.join(REPORTS)}."}, status=400)
+
+    try:
+        days = int(request.GET.get("days", 7))
+        start = parse_day(request.GET.get("start"))
+        end = parse_day(request.GET.get("end"))
+    except ValueError:
+        return JsonResponse({"error": "Invalid days, start or end."}, status=400)
+    if not 1 <= days <= MAX_EXPORT_DAYS:
+        return JsonResponse({"error": f"days must be between 1 and {MAX_EXPORT_DAYS}."}, status=400)
+    start, end = report_range(start, end, days)
+    if start > end or (end - start).days >= MAX_EXPORT_DAYS:
+        return JsonResponse({"error": f"The range must be at most {MAX_EXPORT_DAYS} days, start before end."}, status=400)
+
+    header, query = REPORTS[report]
+    writer = csv.writer(Echo())
+    rows = query(start, end).iterator()
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in itertools.chain([header], rows)), content_type="text/csv"
+    )
+    filename = f"applymatic-{report}-{start}-to-{end}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,260 @@
+import csv
+import json
+import codecs
+from functools import wraps
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from apps.accounts.models import ApiToken
+from .forms import CampaignOptionsForm
+from .models import SendProgress, ScheduledCampaign, ScheduledLead
+from .templating import compile_campaign, TemplateError
+from .scanner import EMAIL_PATTERN
+from .utils import build_lead, detect_lead_columns, get_latest_campaign_path
+from .scheduler import start_campaign
+
+# Line-level problems reported back per upload, so a bad file doesn't produce a huge response
+MAX_REPORTED_ERRORS = 20
+# Longer values would fail the whole upload's INSERT on PostgreSQL, so they're rejected per line
+MAX_LEAD_EMAIL_LENGTH = ScheduledLead._meta.get_field('email').max_length
+MAX_LEAD_FIELD_LENGTH = ScheduledLead._meta.get_field('company_name').max_length
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+CSV_CONTENT_TYPES = ('text/csv',)
+
+# ==========================================
+# 1. Authentication
+# ==========================================
+
+def api_view(methods):
+    """
+    Bearer-token auth for the campaign API: `Authorization: Bearer <key>`
+    (keys come from `manage.py create_api_token`). Session cookies are not
+    accepted, which is what makes skipping CSRF safe here.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({"error": f"Method {request.method} not allowed."}, status=405)
+            scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+            user = ApiToken.authenticate(key.strip()) if scheme.lower() == "bearer" and key.strip() else None
+            if user is None:
+                return JsonResponse({"error": "Missing or invalid API token."}, status=401)
+            request.api_user = user
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_api_campaign(request, campaign_id):
+    return ScheduledCampaign.objects.select_related('progress').filter(pk=campaign_id, user=request.api_user).first()
+
+# ==========================================
+# 2. Streaming Lead Parsers
+# ==========================================
+
+def text_field(record, field):
+    """A company_name/website value as text (numbers are converted), or None; ValueError for anything else."""
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{field} must be text")
+    value = str(value).strip()
+    if len(value) > MAX_LEAD_FIELD_LENGTH:
+        raise ValueError(f"{field} is longer than {MAX_LEAD_FIELD_LENGTH} characters")
+    return value or None
+
+def parse_lead(record, email_re):
+    """Turns one NDJSON object / CSV row dict into a lead, or raises ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    email = str(record.get("email") or "").strip()
+    if not email_re.fullmatch(email):
+        raise ValueError(f"invalid email '{email}'" if email else "missing email")
+    if len(email) > MAX_LEAD_EMAIL_LENGTH:
+        raise ValueError(f"email is longer than {MAX_LEAD_EMAIL_LENGTH} characters")
+    extra = {
+        key: "" if value is None else str(value) for key, value in record.items()
+        if key not in ("email", "company_name", "website")
+    }
+    return build_lead(email, company_name=text_field(record, "company_name"),
+                      website=text_field(record, "website"), extra=extra)
+
+def iter_ndjson_records(lines):
+    """Yields (line_number, record) from a stream of NDJSON byte lines; bad JSON yields the error instead."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"invalid JSON ({e.__class__.__name__})")
+
+def iter_csv_records(lines):
+    """
+    Yields (line_number, record) from a stream of CSV byte lines. The header
+    row is matched like an uploaded spreadsheet's (see detect_lead_columns).
+    """
+    reader = csv.reader(codecs.iterdecode(lines, 'utf-8-sig'))
+    columns = None
+    for row in reader:
+        if columns is None:
+            columns = detect_lead_columns(row)
+            if "email" not in columns:
+                raise ValueError("The CSV header needs an email column.")
+            continue
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {
+            field: row[index].strip() for field, index in columns.items() if index < len(row)
+        }
+
+# ==========================================
+# 3. Endpoints
+# ==========================================
+
+@api_view(["POST"])
+def api_campaigns_view(request):
+    """
+    Creates a draft campaign from a JSON body with the apply form's options:
+    subject, cover_letter and optionally attachment_mode, optimize_attachments,
+    recipient_timezone, send_window_start and send_window_end. The resume and attachments are
+    those of the user's latest campaign.
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "The request body must be JSON."}, status=400)
+
+    form = CampaignOptionsForm(payload if isinstance(payload, dict) else {})
+    if not form.is_valid():
+        return JsonResponse({"error": "Invalid campaign.", "fields": form.errors}, status=400)
+
+    user = request.api_user
+    progress = SendProgress.objects.create(user=user, status=SendProgress.STATUS_DRAFT)
+    campaign = ScheduledCampaign.objects.create(
+        user=user, progress=progress, campaign_folder_id=get_latest_campaign_path(user) or "",
+        subject=form.cleaned_data["subject"], cover_letter=form.cleaned_data["cover_letter"],
+        attachment_mode=form.get_attachment_mode(), optimize_attachments=form.cleaned_data["optimize_attachments"],
+        **form.get_send_window_fields()
+    )
+    return JsonResponse({"campaign_id": campaign.pk, "status": progress.status}, status=201)
+
+@api_view(["GET"])
+def api_campaign_detail_view(request, campaign_id):
+    campaign = get_api_campaign(request, campaign_id)
+    if campaign is None:
+        return JsonResponse({"error": "Campaign not found."}, status=404)
+
+    row = SendProgress.objects.filter(pk=campaign.progress_id).values(*SendProgress.POLL_FIELDS).first()
+    payload = SendProgress.to_payload(row)
+    payload.update({"campaign_id": campaign.pk, "leads": campaign.leads.count()})
+    return JsonResponse(payload)
+
+@api_view(["POST"])
+def api_campaign_leads_view(request, campaign_id):
+    """
+    Adds leads to a draft campaign from the streamed request body, either
+    NDJSON (one {"email": ..., "company_name": ..., "website": ..., <custom>: ...}
+    object per line) or CSV with a header row. The body is parsed line by line
+    and inserted in API_LEAD_BATCH_SIZE bulk INSERTs, so it is never held in
+    memory. Duplicate emails are skipped; an upload is all-or-nothing.
+    """
+    campaign = get_api_campaign(request, campaign_id)
+    if campaign is None:
+        return JsonResponse({"error": "Campaign not found."}, status=404)
+
+    content_type = request.content_type.lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        records = iter_ndjson_records(request)
+    elif content_type in CSV_CONTENT_TYPES:
+        records = iter_csv_records(request)
+    else:
+        return JsonResponse({"error": "Send leads as application/x-ndjson or text/csv."}, status=415)
+
+    email_re = EMAIL_PATTERN
+    accepted = rejected = 0
+    errors = []
+    seen = set()
+    batch = []
+
+    def flush():
+        ScheduledLead.objects.bulk_create(batch, ignore_conflicts=True)
+        batch.clear()
+
+    try:
+        with transaction.atomic():
+            # Locks out a concurrent /start until these leads are in, so none miss its quota plan
+            if not SendProgress.lock_draft(campaign.progress_id):
+                return JsonResponse({"error": "Leads can only be added before the campaign is started."}, status=409)
+            existing = campaign.leads.count()
+            for line_number, record in records:
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    lead = parse_lead(record, email_re)
+                except ValueError as e:
+                    rejected += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"Line {line_number}: {e}")
+                    continue
+
+                if lead["email"] in seen:
+                    continue
+                seen.add(lead["email"])
+                if existing + len(seen) > settings.API_MAX_LEADS_PER_CAMPAIGN:
+                    raise OverflowError
+
+                batch.append(ScheduledLead(
+                    campaign=campaign, email=lead["email"], company_name=lead["company_name"],
+                    website=lead["website"], send_after=campaign.created_at,
+                    extra={key: value for key, value in lead.items() if key not in ("email", "company_name", "website")}
+                ))
+                accepted += 1
+                if len(batch) >= settings.API_LEAD_BATCH_SIZE:
+                    flush()
+            flush()
+    except OverflowError:
+        return JsonResponse({
+            "error": f"A campaign can hold at most {settings.API_MAX_LEADS_PER_CAMPAIGN} leads. Nothing from this upload was added."
+        }, status=413)
+    except (ValueError, csv.Error) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    total = campaign.leads.count()
+    return JsonResponse({
+        "campaign_id": campaign.pk, "accepted": accepted, "rejected": rejected,
+        # Emails already in the campaign from an earlier upload are skipped by the unique constraint
+        "duplicates": accepted - (total - existing), "total_leads": total, "errors": errors,
+    })
+
+@api_view(["POST"])
+def api_campaign_start_view(request, campaign_id):
+    """Validates the templates against the uploaded leads and schedules the campaign for the send worker."""
+    campaign = get_api_campaign(request, campaign_id)
+    if campaign is None:
+        return JsonResponse({"error": "Campaign not found."}, status=404)
+    if not hasattr(request.api_user, 'googleoauthprofile'):
+        return JsonResponse({"error": "Google OAuth credentials missing."}, status=403)
+
+    with transaction.atomic():
+        # The draft stays locked from these checks through planning, so the leads can't change in between
+        if not SendProgress.lock_draft(campaign.progress_id):
+            return JsonResponse({"error": "This campaign has already been started."}, status=409)
+        if not campaign.leads.exists():
+            return JsonResponse({"error": "The campaign has no leads."}, status=400)
+        try:
+            compile_campaign(campaign.subject, campaign.cover_letter, campaign.leads.values_list('extra', flat=True).iterator())
+        except TemplateError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        scheduled = start_campaign(campaign)
+    if scheduled is None:
+        return JsonResponse({"error": "This campaign has already been started."}, status=409)
+    first = campaign.leads.order_by('send_after').values_list('send_after', flat=True).first()
+    return JsonResponse({"campaign_id": campaign.pk, "status": SendProgress.STATUS_SCHEDULED,
+                         "scheduled": scheduled, "next_send_at": first.isoformat()})
@@ -0,0 +1,154 @@
+import time
+import random
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+
+from .transports import is_retryable_google_error, is_rate_limit_google_error
+
+# Every user's Drive calls go through the one GOOGLE_DRIVE_TOKEN_PATH account and share its
+# quota. Calls are scheduled through counters in the Django cache (so across web workers and
+# the send worker when a shared cache is configured, like the guest extraction slots):
+#
+# - at most DRIVE_MAX_CONCURRENT calls run at once, and one user gets DRIVE_MAX_CONCURRENT_PER_USER;
+# - background calls (archiving uploads, the scheduled-send worker) leave the last
+#   DRIVE_INTERACTIVE_RESERVED slots free and wait while any interactive call is queued;
+# - a rate-limit (403 userRateLimitExceeded / 429) or transient 5xx error sets a shared
+#   backoff deadline that every caller waits out before its next call, and the call is retried.
+#   Writes are only retried after a rate limit: a 5xx may come after Drive applied the request.
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+INFLIGHT_KEY = "drive:inflight"
+WAITING_INTERACTIVE_KEY = "drive:waiting:interactive"
+BACKOFF_KEY = "drive:backoff_until"
+# How long to sleep between checks for a free slot
+POLL_MIN_SECONDS = 0.01
+POLL_MAX_SECONDS = 0.2
+
+
+def tenant_key(tenant):
+    return f"drive:inflight:tenant:{tenant}"
+
+def _incr(key, ttl):
+    cache.add(key, 0, ttl)
+    try:
+        count = cache.incr(key)
+    except ValueError:  # Expired between add and incr
+        cache.add(key, 1, ttl)
+        return 1
+    # add() only sets the TTL when it creates the key: under steady load it would expire with slots held
+    cache.touch(key, ttl)
+    return count
+
+def _decr(key):
+    try:
+        if cache.decr(key) < 0:
+            # The key expired and restarted from 0 while this slot was held
+            cache.incr(key)
+    except ValueError:
+        pass
+
+def backoff_remaining():
+    return max(0.0, (cache.get(BACKOFF_KEY) or 0) - time.time())
+
+def back_off(attempt):
+    """Pushes the shared backoff deadline out by ~2**attempt seconds (never pulls it in)."""
+    delay = min(2 ** attempt, settings.DRIVE_MAX_BACKOFF_SECONDS) + random.random()
+    until = max(time.time() + delay, cache.get(BACKOFF_KEY) or 0)
+    cache.set(BACKOFF_KEY, until, int(delay) + 2)
+    return delay
+
+# ==========================================
+# 1. Slots
+# ==========================================
+
+def _try_acquire(tenant, priority, ttl):
+    """Takes a global and a per-tenant slot if both are free. Returns the keys taken, or None."""
+    if backoff_remaining():
+        return None
+    if priority == BACKGROUND and (cache.get(WAITING_INTERACTIVE_KEY) or 0) > 0:
+        return None
+
+    limit = settings.DRIVE_MAX_CONCURRENT
+    if priority == BACKGROUND:
+        limit = max(1, limit - settings.DRIVE_INTERACTIVE_RESERVED)
+    if _incr(INFLIGHT_KEY, ttl) > limit:
+        _decr(INFLIGHT_KEY)
+        return None
+    keys = [INFLIGHT_KEY]
+
+    if tenant is not None:
+        key = tenant_key(tenant)
+        if _incr(key, ttl) > settings.DRIVE_MAX_CONCURRENT_PER_USER:
+            _decr(key)
+            _decr(INFLIGHT_KEY)
+            return None
+        keys.append(key)
+    return keys
+
+@contextmanager
+def drive_slot(tenant=None, priority=INTERACTIVE):
+    """
+    Holds one Drive slot for `tenant` (a user id, or None for unattributed
+    calls) for the block. Waits up to DRIVE_SLOT_TIMEOUT_SECONDS; after that
+    the call goes ahead anyway, since a slow page beats a broken one. A
+    shared backoff is always waited out, even past the timeout.
+    """
+    # Keys expire on their own, so a crashed worker can't leak a slot forever
+    ttl = settings.DRIVE_SLOT_TIMEOUT_SECONDS * 4
+    deadline = time.monotonic() + settings.DRIVE_SLOT_TIMEOUT_SECONDS
+    poll = POLL_MIN_SECONDS
+    keys = None
+
+    if priority == INTERACTIVE:
+        _incr(WAITING_INTERACTIVE_KEY, ttl)
+    try:
+        while True:
+            keys = _try_acquire(tenant, priority, ttl)
+            if keys is not None:
+                break
+            # Never skip an active backoff: every timed-out caller would hit the account at once
+            if time.monotonic() >= deadline and not backoff_remaining():
+                print(f"Drive scheduler: no slot for {priority} call of tenant {tenant} after "
+                      f"{settings.DRIVE_SLOT_TIMEOUT_SECONDS}s, running it anyway")
+                keys = []
+                break
+            time.sleep(min(max(poll, backoff_remaining()), POLL_MAX_SECONDS))
+            poll = min(poll * 2, POLL_MAX_SECONDS)
+    finally:
+        if priority == INTERACTIVE:
+            _decr(WAITING_INTERACTIVE_KEY)
+
+    try:
+        yield
+    finally:
+        for key in keys:
+            _decr(key)
+
+# ==========================================
+# 2. Scheduled Calls
+# ==========================================
+
+def run_drive_call(func, tenant=None, priority=INTERACTIVE, idempotent=True):
+    """
+    Runs func() (one Drive request, e.g. request.execute) in a slot.
+    Rate-limited and transient errors back everyone off and are retried up
+    to DRIVE_MAX_RETRIES times; the slot is released while waiting. Pass
+    idempotent=False for creates: those are retried after rate limits only,
+    and any other error is raised for the caller to check what was applied.
+    """
+    retryable = is_retryable_google_error if idempotent else is_rate_limit_google_error
+    for attempt in range(settings.DRIVE_MAX_RETRIES + 1):
+        with drive_slot(tenant, priority):
+            try:
+                return func()
+            except Exception as e:
+                if not is_retryable_google_error(e):
+                    raise
+                if attempt == settings.DRIVE_MAX_RETRIES or not retryable(e):
+                    back_off(attempt)  # Still slow everyone else down
+                    raise
+        delay = back_off(attempt)
+        print(f"Drive rate limited or unavailable; backing off {delay:.1f}s (attempt {attempt + 1})")
@@ -1,4 +1,8 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from django import forms
+from django.conf import settings
+
+from .sending import ATTACHMENT_MODE_CHOICES
 
 class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
@@ -36,19 +40,75 @@ class MultipleFileField(forms.FileField):
 
         return cleaned
 
-class ApplyForm(forms.Form):
+class CampaignOptionsForm(forms.Form):
+    """What to send and how: shared by the apply form and the bulk campaign API."""
+    subject = forms.CharField(max_length=255, required=True)
+    cover_letter = forms.CharField(widget=forms.Textarea(attrs={'rows': 10}), required=True)
+
+    attachment_mode = forms.ChoiceField(
+        choices=ATTACHMENT_MODE_CHOICES, required=False, initial=settings.EMAIL_ATTACHMENT_MODE,
+        label="Send Files As"
+    )
+    optimize_attachments = forms.BooleanField(
+        required=False, initial=settings.OPTIMIZE_ATTACHMENTS, label="Shrink attachments before sending",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    # Optional send window, in the recipients' local hours
+    recipient_timezone = forms.CharField(
+        max_length=64, required=False, label="Recipients' Time Zone",
+        widget=forms.TextInput(attrs={'placeholder': 'e.g. Europe/Berlin'})
+    )
+    send_window_start = forms.IntegerField(
+        min_value=0, max_value=23, required=False, label="From hour",
+        widget=forms.NumberInput(attrs={'placeholder': 'From (0-23)'})
+    )
+    send_window_end = forms.IntegerField(
+        min_value=1, max_value=24, required=False, label="To hour",
+        widget=forms.NumberInput(attrs={'placeholder': 'To (1-24)'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        tz_name = (cleaned_data.get("recipient_timezone") or "").strip()
+        if tz_name:
+            try:
+                ZoneInfo(tz_name)
+            except (ZoneInfoNotFoundError, ValueError):
+                self.add_error("recipient_timezone", "Unknown time zone. Use a name like Europe/Berlin.")
+        start, end = cleaned_data.get("send_window_start"), cleaned_data.get("send_window_end")
+        if (start is None) != (end is None):
+            self.add_error("send_window_start", "Set both the start and end hour of the send window.")
+        elif start is not None and start >= end:
+            self.add_error("send_window_start", "The send window must end after it starts.")
+        return cleaned_data
+
+    def get_attachment_mode(self):
+        return self.cleaned_data.get("attachment_mode") or settings.EMAIL_ATTACHMENT_MODE
+
+    def get_send_window_fields(self):
+        """The ScheduledCampaign window fields, or {} when no window was set."""
+        if self.cleaned_data.get("send_window_start") is None:
+            return {}
+        return {
+            "recipient_timezone": (self.cleaned_data.get("recipient_timezone") or "UTC").strip(),
+            "window_start_hour": self.cleaned_data["send_window_start"],
+            "window_end_hour": self.cleaned_data["send_window_end"],
+        }
+
+class ApplyForm(CampaignOptionsForm):
+    field_order = ['companies_file', 'manual_leads_text', 'subject', 'cover_letter', 'resume_pdf', 'attachments']
+
     companies_file = forms.FileField(
         required=False, 
         label="Upload Leads File",
-        help_text="Accepts .pdf, .docx, .txt, .xlsx, .csv"
+        help_text=f"Accepts .pdf, .docx, .txt, .xlsx, .csv, up to {settings.UPLOAD_FIELD_MAX_SIZE_MB['companies_file']} MB"
     )
     manual_leads_text = forms.CharField(
         widget=forms.Textarea(attrs={'rows': 3, 'placeholder': 'Or paste raw text containing emails here...'}),
         required=False,
         label="Manual Text Entry"
     )
-    subject = forms.CharField(max_length=255, required=True)
-    cover_letter = forms.CharField(widget=forms.Textarea(attrs={'rows': 10}), required=True)
     resume_pdf = forms.FileField(required=True, label="Resume (PDF)")
     
     # FIX: Use your custom MultipleFileField here instead of standard forms.FileField
@@ -67,4 +127,4 @@ class ApplyForm(forms.Form):
         # Ensure the user provides at least ONE source of leads
         if not file and not text.strip():
             raise forms.ValidationError("You must either upload a file or paste text containing emails.")
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
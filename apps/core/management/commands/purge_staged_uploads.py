@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.staging import purge_staged_blobs
+
+
+class Command(BaseCommand):
+    help = "Deletes staged apply-page uploads not used within UPLOAD_STAGING_TTL_MINUTES. Run it from cron."
+
+    def handle(self, *args, **options):
+        removed = purge_staged_blobs()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} staged files."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.scheduler import run_due_campaigns
+
+
+class Command(BaseCommand):
+    help = "Sends scheduled campaign emails that are due, within each sender's daily Gmail quota. Run it from cron."
+
+    def handle(self, *args, **options):
+        sent = run_due_campaigns(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} scheduled emails."))
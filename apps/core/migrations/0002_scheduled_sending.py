@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sendprogress',
+            name='status',
+            field=models.CharField(choices=[('sending', 'Sending'), ('scheduled', 'Scheduled'), ('finished', 'Finished'), ('failed', 'Failed')], default='sending', max_length=16),
+        ),
+        migrations.CreateModel(
+            name='ScheduledCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign_folder_id', models.CharField(max_length=255)),
+                ('subject', models.CharField(max_length=255)),
+                ('cover_letter', models.TextField()),
+                ('recipient_timezone', models.CharField(blank=True, max_length=64)),
+                ('window_start_hour', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('window_end_hour', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('progress', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_campaign', to='core.sendprogress')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_campaigns', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySendCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_send_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='unique_daily_send_count')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduledLead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('company_name', models.CharField(blank=True, max_length=255)),
+                ('website', models.CharField(blank=True, max_length=255)),
+                ('send_after', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leads', to='core.scheduledcampaign')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'send_after'], name='core_schedu_status_af67d4_idx')],
+            },
+        ),
+    ]
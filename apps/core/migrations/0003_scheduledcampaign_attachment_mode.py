@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_scheduled_sending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledcampaign',
+            name='attachment_mode',
+            field=models.CharField(default='attach', max_length=8),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_scheduledcampaign_attachment_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledlead',
+            name='extra',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_scheduledlead_extra'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sendprogress',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('sending', 'Sending'), ('scheduled', 'Scheduled'), ('finished', 'Finished'), ('failed', 'Failed')], default='sending', max_length=16),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduledlead',
+            constraint=models.UniqueConstraint(fields=('campaign', 'email'), name='unique_scheduled_lead'),
+        ),
+    ]
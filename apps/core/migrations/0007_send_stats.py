@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_campaigncounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySendStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_send_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'daily send stats',
+                'indexes': [models.Index(fields=['day'], name='core_dailys_day_0c27ea_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='unique_daily_send_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DomainSendStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('domain', models.CharField(max_length=255)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='domain_send_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'domain send stats',
+                'indexes': [models.Index(fields=['day', 'domain'], name='core_domain_day_b7330f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'domain'), name='unique_domain_send_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_send_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledcampaign',
+            name='optimize_attachments',
+            field=models.BooleanField(default=False),
+        ),
+    ]
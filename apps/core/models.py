@@ -1,3 +1,223 @@
-from django.db import models
+from datetime import timedelta
+from django.db import models, transaction
+from django.db.models import F
+from django.contrib.auth.models import User
+from django.utils import timezone
 
-# Create your models here.
+
+class SendProgress(models.Model):
+    """
+    One small counter row per campaign send. The send loop bumps the counters
+    with UPDATE ... SET sent = sent + n, and the progress endpoint reads just
+    this row, so polling never touches the lead list.
+    """
+    STATUS_DRAFT = 'draft'
+    STATUS_SENDING = 'sending'
+    STATUS_SCHEDULED = 'scheduled'
+    STATUS_FINISHED = 'finished'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_DRAFT, 'Draft'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SCHEDULED, 'Scheduled'),
+        (STATUS_FINISHED, 'Finished'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='send_progress')
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_SENDING)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-started_at'])]
+
+    # A "sending" row not updated for this long belongs to a send that died
+    STALE_AFTER = timedelta(minutes=10)
+
+    # Fields the polling endpoint reads
+    POLL_FIELDS = ('id', 'total', 'sent', 'failed', 'status', 'started_at', 'updated_at', 'finished_at')
+
+    @classmethod
+    def claim(cls, user, total):
+        """
+        Starts a send for `user`, or returns None while another of theirs is
+        still running. The user row is locked so two requests can't both pass
+        the check; call this before any slow work (archiving, linking).
+        """
+        with transaction.atomic():
+            User.objects.select_for_update().filter(pk=user.pk).exists()
+            if cls.objects.filter(
+                user=user, status=cls.STATUS_SENDING, updated_at__gte=timezone.now() - cls.STALE_AFTER
+            ).exists():
+                return None
+            return cls.objects.create(user=user, total=total)
+
+    @classmethod
+    def lock_draft(cls, pk):
+        """
+        Write-locks a draft's row until the surrounding transaction ends, so
+        starting a campaign and adding leads to it can't interleave. False
+        when the row is no longer a draft.
+        """
+        return bool(cls.objects.filter(pk=pk, status=cls.STATUS_DRAFT).update(updated_at=timezone.now()))
+
+    def record(self, sent=0, failed=0):
+        """Atomically adds to the counters without reloading the row."""
+        SendProgress.objects.filter(pk=self.pk).update(
+            sent=F('sent') + sent, failed=F('failed') + failed, updated_at=timezone.now()
+        )
+
+    def set_status(self, status):
+        SendProgress.objects.filter(pk=self.pk).update(status=status, updated_at=timezone.now())
+
+    def finish(self, status=STATUS_FINISHED):
+        now = timezone.now()
+        SendProgress.objects.filter(pk=self.pk).update(status=status, updated_at=now, finished_at=now)
+
+    @staticmethod
+    def to_payload(row):
+        """Turns a POLL_FIELDS values() row into the JSON the browser polls, with an ETA."""
+        done = row['sent'] + row['failed']
+        eta_seconds = None
+        # Scheduled sends wait on quota windows, so a rate-based ETA would be meaningless
+        if row['status'] == SendProgress.STATUS_SENDING and done:
+            elapsed = (row['updated_at'] - row['started_at']).total_seconds()
+            eta_seconds = round(elapsed / done * (row['total'] - done))
+        return {
+            "id": row['id'], "status": row['status'], "total": row['total'],
+            "sent": row['sent'], "failed": row['failed'], "eta_seconds": eta_seconds,
+        }
+
+    def __str__(self):
+        return f"Send {self.pk} for {self.user.email}: {self.sent}/{self.total}"
+
+
+class CampaignCounter(models.Model):
+    """
+    Per-user campaign numbering for one storage backend: the last number
+    handed out and a pointer to the newest finished campaign folder, so
+    neither needs a folder listing.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaign_counters')
+    storage = models.CharField(max_length=32)
+    last_number = models.PositiveIntegerField(default=0)
+    latest_number = models.PositiveIntegerField(default=0)
+    latest_folder_id = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'storage'], name='unique_campaign_counter')]
+
+    def __str__(self):
+        return f"{self.user.email} on {self.storage}: campaign {self.latest_number} of {self.last_number}"
+
+
+class DailySendCount(models.Model):
+    """Messages a sender has pushed through Gmail on one (UTC) day, for daily quota tracking."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_send_counts')
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_send_count')]
+
+    def __str__(self):
+        return f"{self.user.email} sent {self.count} on {self.day}"
+
+
+class DailySendStats(models.Model):
+    """
+    Rollup of one user's sends on one (UTC) day, including failures. Bumped by
+    analytics.record_send_stats as each group goes out; reports read only this.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_send_stats')
+    day = models.DateField()
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'daily send stats'
+        constraints = [models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_send_stats')]
+        indexes = [models.Index(fields=['day'])]
+
+    def __str__(self):
+        return f"{self.user.email} on {self.day}: {self.sent} sent, {self.failed} failed"
+
+
+class DomainSendStats(models.Model):
+    """Rollup of one user's sends to one recipient domain on one (UTC) day."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='domain_send_stats')
+    day = models.DateField()
+    domain = models.CharField(max_length=255)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'domain send stats'
+        constraints = [models.UniqueConstraint(fields=['user', 'day', 'domain'], name='unique_domain_send_stats')]
+        indexes = [models.Index(fields=['day', 'domain'])]
+
+    def __str__(self):
+        return f"{self.user.email} to {self.domain} on {self.day}: {self.sent} sent"
+
+
+class ScheduledCampaign(models.Model):
+    """
+    The part of a campaign that did not fit in today's Gmail quota (or the
+    recipients' send window), or a campaign built through the bulk API.
+    Attachments are re-read from the archived campaign folder when the
+    scheduled leads go out.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scheduled_campaigns')
+    progress = models.OneToOneField(SendProgress, on_delete=models.CASCADE, related_name='scheduled_campaign')
+    campaign_folder_id = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    cover_letter = models.TextField()
+    # sending.ATTACH_FILES / LINK_FILES / LINK_LARGE_FILES
+    attachment_mode = models.CharField(max_length=8, default='attach')
+    # Recompress the attached files once before sending (see optimize.py)
+    optimize_attachments = models.BooleanField(default=False)
+    # Optional send window, in hours of the recipients' local day
+    recipient_timezone = models.CharField(max_length=64, blank=True)
+    window_start_hour = models.PositiveSmallIntegerField(null=True, blank=True)
+    window_end_hour = models.PositiveSmallIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Scheduled campaign {self.pk} for {self.user.email}"
+
+
+class ScheduledLead(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    campaign = models.ForeignKey(ScheduledCampaign, on_delete=models.CASCADE, related_name='leads')
+    email = models.EmailField()
+    company_name = models.CharField(max_length=255, blank=True)
+    website = models.CharField(max_length=255, blank=True)
+    # Custom lead-file columns used by the campaign's templates
+    extra = models.JSONField(default=dict, blank=True)
+    send_after = models.DateTimeField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'send_after'])]
+        constraints = [models.UniqueConstraint(fields=['campaign', 'email'], name='unique_scheduled_lead')]
+
+    def as_lead(self):
+        return {**self.extra, "email": self.email, "company_name": self.company_name, "website": self.website}
+
+    def __str__(self):
+        return f"{self.email} after {self.send_after:%Y-%m-%d %H:%M}"
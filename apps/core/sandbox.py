@@ -0,0 +1,155 @@
+import os
+import multiprocessing
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils import extract_leads, ExtractionLimitExceeded
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the wall-clock timeout still applies
+    resource = None
+
+# ==========================================
+# 1. Errors
+# ==========================================
+
+class ExtractionBusy(Exception):
+    """Too many guest extractions are already running (for this IP or overall)."""
+    pass
+
+# ==========================================
+# 2. Child Process
+# ==========================================
+
+def _current_address_space():
+    """Bytes of virtual memory this process already uses (0 if unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def _apply_limits(cpu_seconds, memory_mb):
+    if resource is None:
+        return
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    # A forked child starts with the parent's address space, so the budget is on top of that
+    memory_bytes = _current_address_space() + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+def _extract_in_child(conn, file_path, manual_text, cpu_seconds, memory_mb, max_pages):
+    try:
+        _apply_limits(cpu_seconds, memory_mb)
+        leads = extract_leads(file_path=file_path, manual_text=manual_text, max_pages=max_pages)
+        conn.send(("ok", leads))
+    except MemoryError:
+        conn.send(("limit", "This file needs more memory than guest extraction allows."))
+    except ExtractionLimitExceeded as e:
+        conn.send(("limit", str(e)))
+    except ValueError as e:
+        conn.send(("error", str(e)))
+    except Exception as e:
+        conn.send(("error", f"Failed to parse file: {str(e)}"))
+    finally:
+        conn.close()
+
+def extract_leads_sandboxed(file_path=None, manual_text=""):
+    """
+    Runs extract_leads in a child process under CPU-time, memory and PDF page
+    limits, with a wall-clock timeout enforced from the parent. A pathological
+    file kills the child, never the web worker.
+
+    Raises ExtractionLimitExceeded when a budget is hit and a plain ValueError
+    for files that simply fail to parse.
+    """
+    method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    ctx = multiprocessing.get_context(method)
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_extract_in_child,
+        args=(child_conn, file_path, manual_text, settings.GUEST_EXTRACT_CPU_SECONDS,
+              settings.GUEST_EXTRACT_MAX_MEMORY_MB, settings.GUEST_EXTRACT_MAX_PDF_PAGES),
+        daemon=True,
+    )
+    process.start()
+    child_conn.close()
+
+    result = None
+    timed_out = False
+    try:
+        if parent_conn.poll(settings.GUEST_EXTRACT_TIMEOUT_SECONDS):
+            try:
+                result = parent_conn.recv()
+            except EOFError:
+                pass  # Child died without answering (killed by an rlimit)
+        else:
+            timed_out = True
+    finally:
+        parent_conn.close()
+        process.join(timeout=1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    if result is None:
+        if timed_out:
+            raise ExtractionLimitExceeded("This file took too long to process. Try a smaller file or paste the text instead.")
+        raise ExtractionLimitExceeded("This file needs more resources than guest extraction allows.")
+
+    status, payload = result
+    if status == "ok":
+        return payload
+    if status == "limit":
+        raise ExtractionLimitExceeded(payload)
+    raise ValueError(payload)
+
+# ==========================================
+# 3. Concurrency Limits
+# ==========================================
+
+def get_client_ip(request):
+    """Client IP, trusting X-Forwarded-For only behind the production proxy."""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and settings.PRODUCTION:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', 'unknown')
+
+@contextmanager
+def guest_extraction_slot(request):
+    """
+    Holds one guest extraction slot for the block, both for the client IP and
+    overall. Counters live in the Django cache, so the limits span workers when
+    a shared cache is configured. Raises ExtractionBusy when no slot is free.
+    """
+    # Keys expire on their own, so a crashed worker can't leak a slot forever
+    ttl = settings.GUEST_EXTRACT_TIMEOUT_SECONDS * 2
+    keys = [
+        (f"guest_extract:ip:{get_client_ip(request)}", settings.GUEST_EXTRACT_MAX_PER_IP),
+        ("guest_extract:global", settings.GUEST_EXTRACT_MAX_CONCURRENT),
+    ]
+
+    acquired = []
+    try:
+        for key, limit in keys:
+            cache.add(key, 0, ttl)
+            try:
+                count = cache.incr(key)
+                # add() only sets the TTL when it creates the key: under steady load it would expire mid-extraction
+                cache.touch(key, ttl)
+            except ValueError:  # Expired between add and incr
+                cache.add(key, 1, ttl)
+                count = 1
+            acquired.append(key)
+            if count > limit:
+                raise ExtractionBusy("Too many extractions are running right now. Please try again in a moment.")
+        yield
+    finally:
+        for key in acquired:
+            try:
+                if cache.decr(key) < 0:
+                    # The key expired and restarted from 0 while this slot was held
+                    cache.incr(key)
+            except ValueError:
+                pass
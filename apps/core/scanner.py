@@ -0,0 +1,106 @@
+import re
+
+EMAIL_RE = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+EMAIL_PATTERN = re.compile(EMAIL_RE)
+
+# The scan starts from each '@' (a literal, so the regex engine skips ahead to it quickly)
+# and only then walks back over the local part, instead of trying every word as one
+AT_DOMAIN_RE = re.compile(r"@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+LOCAL_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-"
+EMAIL_CHARS = frozenset(LOCAL_CHARS + "@")
+# How far back from an '@' the fast path looks for the local part
+MAX_LOCAL_LENGTH = 64
+
+# Fed text is buffered and scanned in blocks this size, so tiny chunks (a docx
+# paragraph, a spreadsheet row) don't each pay for a scan
+SCAN_BLOCK_CHARS = 1 << 16
+# The longest tail kept back for the next chunk when a block ends mid-word
+MAX_CARRY_CHARS = 512
+
+
+def normalize_email(email):
+    return email.lower()
+
+def iter_email_matches(text):
+    """
+    Yields every email in `text` in order, as written. Finds the same
+    non-overlapping matches as EMAIL_PATTERN.findall, several times faster.
+    """
+    last_end = 0
+    for match in AT_DOMAIN_RE.finditer(text):
+        at = match.start()
+        # A local part can't reach back into the previous match
+        start = max(last_end, at - MAX_LOCAL_LENGTH)
+        window = text[start:at]
+        local_length = len(window) - len(window.rstrip(LOCAL_CHARS))
+        if local_length == len(window):
+            # It may run on past the window, and findall would take all of it
+            while start > last_end and text[start - 1] in LOCAL_CHARS:
+                start -= 1
+            local_length = at - start
+        if not local_length:
+            continue
+        last_end = match.end()
+        yield text[at - local_length:last_end]
+
+
+class EmailScanner:
+    """
+    Collects the distinct emails of text fed in any number of chunks, lowercased
+    and in first-seen order, so `HR@Acme.com` and `hr@acme.com` are one lead.
+    An email split across two chunks is still found.
+
+        scanner = EmailScanner()
+        for page in pages:
+            scanner.feed(page)
+        emails = scanner.finish()
+    """
+
+    def __init__(self, seen=None):
+        # `seen` skips emails already collected elsewhere (e.g. from a spreadsheet's columns)
+        self.seen = set(seen or ())
+        self.emails = []
+        self._pending = []
+        self._pending_chars = 0
+
+    def feed(self, text):
+        if not text:
+            return
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars >= SCAN_BLOCK_CHARS:
+            self._scan(final=False)
+
+    def finish(self):
+        """Scans whatever is still buffered and returns all the emails found."""
+        self._scan(final=True)
+        return self.emails
+
+    def _scan(self, final):
+        block = "".join(self._pending)
+        carry = ""
+        if not final:
+            # Hold back a trailing partial word: it may be the start of an email
+            # that continues in the next chunk
+            cut = len(block)
+            floor = max(0, cut - MAX_CARRY_CHARS)
+            while cut > floor and block[cut - 1] in EMAIL_CHARS:
+                cut -= 1
+            block, carry = block[:cut], block[cut:]
+
+        seen, emails = self.seen, self.emails
+        for email in iter_email_matches(block):
+            key = normalize_email(email)
+            if key not in seen:
+                seen.add(key)
+                emails.append(key)
+
+        self._pending = [carry] if carry else []
+        self._pending_chars = len(carry)
+
+
+def scan_emails(text, seen=None):
+    """The distinct, lowercased emails in `text`, in first-seen order."""
+    scanner = EmailScanner(seen)
+    scanner.feed(text)
+    return scanner.finish()
@@ -0,0 +1,256 @@
+from itertools import groupby
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction, IntegrityError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import DailySendCount, ScheduledCampaign, ScheduledLead, SendProgress
+
+# ==========================================
+# 1. Daily Quota
+# ==========================================
+
+def quota_day(moment=None):
+    """Quota days run midnight to midnight UTC."""
+    return (moment or timezone.now()).astimezone(dt_timezone.utc).date()
+
+def quota_used(user, day=None):
+    day = day or quota_day()
+    return DailySendCount.objects.filter(user=user, day=day).values_list('count', flat=True).first() or 0
+
+def quota_remaining(user, day=None):
+    return max(settings.GMAIL_DAILY_SEND_LIMIT - quota_used(user, day), 0)
+
+def consume_quota(user, count, day=None):
+    """Adds `count` sent messages to the sender's tally for the day."""
+    if not count:
+        return
+    day = day or quota_day()
+    updated = DailySendCount.objects.filter(user=user, day=day).update(count=F('count') + count)
+    if not updated:
+        try:
+            with transaction.atomic():
+                DailySendCount.objects.create(user=user, day=day, count=count)
+        except IntegrityError:
+            # Another worker created today's row first
+            DailySendCount.objects.filter(user=user, day=day).update(count=F('count') + count)
+
+# ==========================================
+# 2. Send Windows & Planning
+# ==========================================
+
+class SendWindow:
+    """Hours [start_hour, end_hour) of the recipients' local day in which mail may go out."""
+
+    def __init__(self, timezone_name, start_hour, end_hour):
+        self.tz = ZoneInfo(timezone_name or 'UTC')
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+
+    @classmethod
+    def from_fields(cls, recipient_timezone="", window_start_hour=None, window_end_hour=None):
+        """Builds a window from ScheduledCampaign-style fields, or None when no window is set."""
+        if window_start_hour is None or window_end_hour is None:
+            return None
+        return cls(recipient_timezone, window_start_hour, window_end_hour)
+
+    @classmethod
+    def for_campaign(cls, campaign):
+        return cls.from_fields(campaign.recipient_timezone, campaign.window_start_hour, campaign.window_end_hour)
+
+    def is_open(self, moment):
+        return self.start_hour <= moment.astimezone(self.tz).hour < self.end_hour
+
+    def next_open(self, moment):
+        """`moment` itself if the window is open, else the start of the next window."""
+        if self.is_open(moment):
+            return moment
+        local = moment.astimezone(self.tz)
+        start = datetime.combine(local.date(), dt_time(self.start_hour), tzinfo=self.tz)
+        if local >= start:
+            start = datetime.combine(local.date() + timedelta(days=1), dt_time(self.start_hour), tzinfo=self.tz)
+        return start.astimezone(dt_timezone.utc)
+
+def plan_send_times(user, count, now=None, window=None):
+    """
+    Assigns a send-after time to each of `count` messages: as many as the
+    sender's remaining quota allows right away (or at the next window opening),
+    then one daily-limit's worth at each following quota day.
+    """
+    now = now or timezone.now()
+    limit = settings.GMAIL_DAILY_SEND_LIMIT
+    if limit <= 0:
+        # No day would ever have capacity, so the loop below would never end
+        raise ImproperlyConfigured("GMAIL_DAILY_SEND_LIMIT must be at least 1.")
+    used = {quota_day(now): quota_used(user, quota_day(now))}
+
+    times = []
+    moment = window.next_open(now) if window else now
+    while len(times) < count:
+        day = quota_day(moment)
+        capacity = limit - used.get(day, 0)
+        if capacity > 0:
+            batch = min(capacity, count - len(times))
+            times.extend([moment] * batch)
+            used[day] = used.get(day, 0) + batch
+        next_day = datetime.combine(day + timedelta(days=1), dt_time(0), tzinfo=dt_timezone.utc)
+        moment = window.next_open(next_day) if window else next_day
+    return times
+
+def schedule_leads(user, progress, leads, send_times, campaign_folder_id, subject, cover_letter,
+                   window_fields=None, attachment_mode='attach', optimize_attachments=False):
+    """Stores the leads that can't go out now as a ScheduledCampaign for the worker to pick up."""
+    campaign = ScheduledCampaign.objects.create(
+        user=user, progress=progress, campaign_folder_id=campaign_folder_id or "",
+        subject=subject, cover_letter=cover_letter, attachment_mode=attachment_mode,
+        optimize_attachments=optimize_attachments, **(window_fields or {})
+    )
+    ScheduledLead.objects.bulk_create([
+        ScheduledLead(
+            campaign=campaign, email=lead["email"], company_name=lead.get("company_name", ""),
+            website=lead.get("website", ""), send_after=send_after,
+            extra={key: value for key, value in lead.items() if key not in ("email", "company_name", "website")}
+        )
+        for lead, send_after in zip(leads, send_times)
+    ], batch_size=1000)
+    progress.set_status(SendProgress.STATUS_SCHEDULED)
+    return campaign
+
+def start_campaign(campaign, now=None):
+    """
+    Plans send times for every pending lead of a draft campaign (one built
+    through the bulk API) and hands it to the worker. Returns the number of
+    leads scheduled, or None if the campaign was no longer a draft.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Held until commit: a concurrent start or lead upload waits, then finds it started
+        if not SendProgress.lock_draft(campaign.progress_id):
+            return None
+        pending = campaign.leads.filter(status=ScheduledLead.STATUS_PENDING)
+        pks = list(pending.order_by('pk').values_list('pk', flat=True))
+        send_times = plan_send_times(campaign.user, len(pks), now=now, window=SendWindow.for_campaign(campaign))
+
+        # Times come in runs of equal values; one range UPDATE per run keeps huge IN lists out of the SQL
+        start = 0
+        for send_after, run in groupby(send_times):
+            end = start + len(list(run))
+            pending.filter(pk__gte=pks[start], pk__lte=pks[end - 1]).update(send_after=send_after)
+            start = end
+        SendProgress.objects.filter(pk=campaign.progress_id, status=SendProgress.STATUS_DRAFT).update(
+            total=len(pks), status=SendProgress.STATUS_SCHEDULED, started_at=now, updated_at=now
+        )
+    return len(pks)
+
+# ==========================================
+# 3. Scheduled Send Worker
+# ==========================================
+
+def claim_campaign(campaign, now):
+    """
+    Flips the campaign's progress row from scheduled to sending, so overlapping
+    worker runs never send the same leads twice. A send that died mid-way is
+    reclaimed once its row has gone stale.
+    """
+    claimable = Q(status=SendProgress.STATUS_SCHEDULED) | Q(
+        status=SendProgress.STATUS_SENDING, updated_at__lt=now - SendProgress.STALE_AFTER
+    )
+    return bool(SendProgress.objects.filter(claimable, pk=campaign.progress_id).update(
+        status=SendProgress.STATUS_SENDING, updated_at=timezone.now()
+    ))
+
+def run_due_campaigns(now=None, stdout=None):
+    """
+    Sends every scheduled lead whose time has come, within each sender's
+    remaining daily quota and the campaign's send window. Run it periodically
+    (python manage.py send_scheduled_campaigns). Returns the number sent.
+    """
+    from .storage import get_campaign_storage, get_file_from_storage
+    from .sending import send_to_leads, link_campaign_files, append_links, attachment_number
+    from .optimize import optimize_campaign_files
+
+    now = now or timezone.now()
+    total_sent = 0
+    campaign_ids = (ScheduledLead.objects
+                    .filter(status=ScheduledLead.STATUS_PENDING, send_after__lte=now)
+                    .values_list('campaign_id', flat=True).distinct())
+
+    for campaign in (ScheduledCampaign.objects.filter(pk__in=list(campaign_ids))
+                     .exclude(progress__status=SendProgress.STATUS_DRAFT).select_related('user', 'progress')):
+        window = SendWindow.for_campaign(campaign)
+        if window and not window.is_open(now):
+            continue
+
+        if not quota_remaining(campaign.user):
+            continue
+
+        profile = getattr(campaign.user, 'googleoauthprofile', None)
+        try:
+            credentials = profile.get_credentials() if profile else None
+        except Exception as e:
+            # e.g. a revoked refresh token; the user's leads wait until they sign in again
+            print(f"Could not load credentials for {campaign}: {e}")
+            continue
+        if not credentials:
+            continue
+
+        if not claim_campaign(campaign, now):
+            continue
+        sent_count = 0
+        try:
+            # Read only once claimed: an overlapping run may have just sent (and counted) what was pending
+            due = list(campaign.leads.filter(status=ScheduledLead.STATUS_PENDING, send_after__lte=now)
+                       .order_by('send_after', 'pk')[:quota_remaining(campaign.user)])
+            if not due:
+                continue
+            storage = get_campaign_storage(user=campaign.user, background=True)
+            resume_pdf, attachments = None, []
+            if campaign.campaign_folder_id:
+                items = storage.list_folder(campaign.campaign_folder_id)
+                for item in items:
+                    if item['name'].startswith("resume"):
+                        resume_pdf = get_file_from_storage(storage, item['id'], item['name'])
+                attachment_items = sorted((item for item in items if item['name'].startswith("attachment_")),
+                                          key=lambda item: attachment_number(item['name']))
+                for item in attachment_items:
+                    attachments.append(get_file_from_storage(storage, item['id'], item['name']))
+
+            resume_pdf, attachments, links = link_campaign_files(
+                storage, campaign.campaign_folder_id, resume_pdf, attachments, campaign.attachment_mode
+            )
+            if campaign.optimize_attachments:
+                # Cached by content hash, so only the first run of a campaign pays for this
+                resume_pdf, attachments, _ = optimize_campaign_files(resume_pdf, attachments)
+            by_email = {lead.email: lead for lead in due}
+
+            def mark(sent_leads, failed_leads):
+                sent_at = timezone.now()
+                ScheduledLead.objects.filter(pk__in=[by_email[l["email"]].pk for l in sent_leads]).update(
+                    status=ScheduledLead.STATUS_SENT, sent_at=sent_at)
+                ScheduledLead.objects.filter(pk__in=[by_email[l["email"]].pk for l in failed_leads]).update(
+                    status=ScheduledLead.STATUS_FAILED)
+                consume_quota(campaign.user, len(sent_leads))
+
+            sent_count, _ = send_to_leads(
+                credentials, campaign.user.email, [lead.as_lead() for lead in due],
+                campaign.subject, append_links(campaign.cover_letter, links), resume_pdf=resume_pdf,
+                attachments=attachments, progress=campaign.progress, on_group_sent=mark
+            )
+        except Exception as e:
+            # One campaign's Drive, credential or Gmail failure mustn't stop everyone else's sends;
+            # its unsent leads stay pending and are retried on the next run
+            print(f"Scheduled send for {campaign} failed: {e}")
+        finally:
+            if campaign.leads.filter(status=ScheduledLead.STATUS_PENDING).exists():
+                campaign.progress.set_status(SendProgress.STATUS_SCHEDULED)
+            else:
+                campaign.progress.finish()
+        total_sent += sent_count
+
+        if stdout:
+            stdout.write(f"{campaign}: sent {sent_count} of {len(due)} due")
+
+    return total_sent
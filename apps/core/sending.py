@@ -0,0 +1,124 @@
+import os
+import time
+from django.conf import settings
+
+from .transports import get_transport, build_message
+from .templating import compile_campaign
+from .analytics import record_send_stats
+
+# ==========================================
+# 1. Attach-by-Link
+# ==========================================
+
+ATTACH_FILES = 'attach'
+LINK_FILES = 'link'
+LINK_LARGE_FILES = 'auto'
+ATTACHMENT_MODE_CHOICES = [
+    (ATTACH_FILES, 'Attach files to every email'),
+    (LINK_FILES, 'Share files once and link them'),
+    (LINK_LARGE_FILES, 'Attach small files, link large ones'),
+]
+
+def file_size(file_obj):
+    size = getattr(file_obj, 'size', None)
+    if size is None:
+        file_obj.seek(0, os.SEEK_END)
+        size = file_obj.tell()
+        file_obj.seek(0)
+    return size
+
+def attachment_number(name):
+    """
+    The n of an archived attachment_<n><ext>. Storage listings come back in no
+    particular order, and link_campaign_files matches attachments to their
+    archived copies by position, so sort downloaded attachments by this first.
+    """
+    number = os.path.splitext(name)[0].rpartition('_')[2]
+    return int(number) if number.isdigit() else 0
+
+def link_campaign_files(storage, campaign_folder_id, resume_pdf, attachments, mode):
+    """
+    Swaps campaign files for share links to their archived copies, so each
+    email carries a URL instead of the file. In LINK_LARGE_FILES mode only
+    files over ATTACH_INLINE_MAX_MB are linked. Files the storage backend
+    can't share stay attached.
+
+    Returns (resume_pdf, attachments, links) where links is a list of
+    (filename, url) and the returned files are the ones still to attach.
+    """
+    attachments = list(attachments or [])
+    if mode == ATTACH_FILES or not campaign_folder_id or not (resume_pdf or attachments):
+        return resume_pdf, attachments, []
+
+    # save_campaign_records archives the files as resume<ext> and attachment_<n><ext>
+    archived = {item['name']: item['id'] for item in storage.list_folder(campaign_folder_id)}
+    inline_limit = settings.ATTACH_INLINE_MAX_MB * 1024 * 1024
+    links = []
+
+    def try_link(stored_name, file_obj):
+        if mode == LINK_LARGE_FILES and file_size(file_obj) <= inline_limit:
+            return False
+        file_id = archived.get(stored_name)
+        url = storage.share_link(file_id) if file_id else None
+        if url:
+            links.append((os.path.basename(file_obj.name), url))
+        return bool(url)
+
+    if resume_pdf and try_link(f"resume{os.path.splitext(resume_pdf.name)[1]}", resume_pdf):
+        resume_pdf = None
+    attachments = [
+        att for index, att in enumerate(attachments, start=1)
+        if not try_link(f"attachment_{index}{os.path.splitext(att.name)[1]}", att)
+    ]
+    return resume_pdf, attachments, links
+
+def append_links(cover_letter, links):
+    if not links:
+        return cover_letter
+    # The body is a template, so keep braces in file names literal
+    lines = "\n".join(f"- {name}: {url}" for name, url in links).replace("{", "{{").replace("}", "}}")
+    return f"{cover_letter}\n\n{lines}"
+
+# ==========================================
+# 2. Campaign Send Loop
+# ==========================================
+
+def send_to_leads(credentials, sender_email, leads, subject, cover_letter, resume_pdf=None,
+                  attachments=None, progress=None, on_group_sent=None):
+    """
+    Sends the campaign to `leads` through one transport, in groups of the
+    transport's batch_size. The subject and cover letter are templates
+    (see templating.py), compiled once here and rendered per lead. Bumps `progress` (a SendProgress) and the
+    analytics rollups after each group, and calls on_group_sent(sent_leads, failed_leads) if given.
+
+    Returns (sent_count, failed_emails).
+    """
+    sent_count = 0
+    failed_emails = []
+    template = compile_campaign(subject, cover_letter)
+
+    with get_transport(credentials, sender_email) as transport:
+        for start in range(0, len(leads), transport.batch_size):
+            group = leads[start:start + transport.batch_size]
+            messages = []
+            for lead in group:
+                lead_subject, lead_body = template.render(lead)
+                messages.append(build_message(
+                    sender_email=sender_email, to_email=lead["email"], subject=lead_subject,
+                    body_text=lead_body, resume_pdf=resume_pdf, attachments=attachments
+                ))
+
+            sent_leads, failed_leads = [], []
+            for lead, result in zip(group, transport.send_many(messages)):
+                (sent_leads if result else failed_leads).append(lead)
+
+            sent_count += len(sent_leads)
+            failed_emails.extend(lead["email"] for lead in failed_leads)
+            if progress is not None:
+                progress.record(sent=len(sent_leads), failed=len(failed_leads))
+                record_send_stats(progress.user_id, sent_leads, failed_leads)
+            if on_group_sent is not None:
+                on_group_sent(sent_leads, failed_leads)
+            time.sleep(settings.EMAIL_SEND_DELAY_SECONDS)
+
+    return sent_count, failed_emails
@@ -0,0 +1,144 @@
+import os
+import time
+import secrets
+import tempfile
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+# Files the apply page uploads once and then refers to by handle
+STAGED_FIELDS = ('companies_file', 'resume_pdf', 'attachments')
+SESSION_KEY = 'staged_uploads'
+
+
+class StagingError(ValueError):
+    pass
+
+# ==========================================
+# 1. Content-Addressed Blob Store
+# ==========================================
+
+def staging_root():
+    return os.path.join(settings.MEDIA_ROOT, 'staging')
+
+def blob_path(sha256, ext):
+    return os.path.join(staging_root(), sha256[:2], f"{sha256}{ext.lower()}")
+
+def store_blob(uploaded, sha256, ext):
+    """Writes the upload under its hash unless an identical file is already staged."""
+    path = blob_path(sha256, ext)
+    if os.path.exists(path):
+        # Refresh the mtime so the purge treats it as recently used
+        os.utime(path)
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            uploaded.seek(0)
+            for chunk in uploaded.chunks():
+                out.write(chunk)
+        # Atomic, so a concurrent reader never sees a half-written blob
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    uploaded.seek(0)
+    return path
+
+def purge_staged_blobs(max_age_seconds=None):
+    """Deletes blobs not staged or used within the TTL. Returns how many were removed."""
+    max_age_seconds = max_age_seconds if max_age_seconds is not None else settings.UPLOAD_STAGING_TTL_MINUTES * 60
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    root = staging_root()
+    if not os.path.isdir(root):
+        return 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
+
+# ==========================================
+# 2. Per-Session Handles
+# ==========================================
+
+def stage_request_files(request):
+    """
+    Stages every file uploaded with this request and returns
+    {field: [handle, ...]}. Handles live in the user's session, so they
+    can't be used to reach someone else's files even for identical content.
+    """
+    from .utils import get_file_hash
+
+    stored = request.session.get(SESSION_KEY, {})
+    now = time.time()
+    # Drop expired handles while we're here
+    staged = {handle: meta for handle, meta in stored.items() if meta['expires'] > now}
+
+    handles = {}
+    for field in STAGED_FIELDS:
+        for uploaded in request.FILES.getlist(field):
+            # Files we resolved from handles for this request are already staged
+            if getattr(uploaded, 'staged_handle', None):
+                handles.setdefault(field, []).append(uploaded.staged_handle)
+                continue
+
+            sha256 = get_file_hash(uploaded)
+            ext = os.path.splitext(uploaded.name)[1]
+            store_blob(uploaded, sha256, ext)
+            handle = secrets.token_urlsafe(16)
+            staged[handle] = {
+                'sha256': sha256, 'ext': ext, 'name': uploaded.name, 'size': uploaded.size,
+                'content_type': getattr(uploaded, 'sniffed_content_type', None) or uploaded.content_type,
+                'expires': now + settings.UPLOAD_STAGING_TTL_MINUTES * 60,
+            }
+            uploaded.staged_handle = handle
+            handles.setdefault(field, []).append(handle)
+
+    if staged != stored:
+        request.session[SESSION_KEY] = staged
+    return handles
+
+def open_staged_file(meta, handle):
+    path = blob_path(meta['sha256'], meta['ext'])
+    try:
+        fh = open(path, 'rb')
+    except FileNotFoundError:
+        raise StagingError(f"'{meta['name']}' is no longer on the server. Please select it again.")
+    os.utime(path)
+
+    uploaded = UploadedFile(file=fh, name=meta['name'], content_type=meta['content_type'], size=meta['size'])
+    # The same attributes the hashing upload handlers set, so nothing re-reads the file
+    uploaded.sha256 = meta['sha256']
+    uploaded.sniffed_content_type = meta['content_type']
+    uploaded.staged_handle = handle
+    uploaded.staged_path = path
+    return uploaded
+
+def attach_staged_files(request):
+    """
+    Resolves `staged_<field>` handles posted instead of files and puts the
+    staged files into request.FILES, where the form and views expect them.
+    A field actually uploaded with this request wins over its handles.
+    """
+    staged = request.session.get(SESSION_KEY, {})
+    now = time.time()
+    for field in STAGED_FIELDS:
+        handles = request.POST.getlist(f"staged_{field}")
+        if not handles or request.FILES.getlist(field):
+            continue
+        files = []
+        for handle in handles:
+            meta = staged.get(handle)
+            if meta is None or meta['expires'] <= now:
+                raise StagingError("An uploaded file has expired. Please select your files again.")
+            files.append(open_staged_file(meta, handle))
+        request.FILES.setlist(field, files)
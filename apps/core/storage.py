@@ -0,0 +1,235 @@
+import io
+import os
+import shutil
+from django.conf import settings
+
+from .fairshare import run_drive_call, INTERACTIVE, BACKGROUND
+from .transports import is_retryable_google_error
+
+FOLDER_MIMETYPE = 'application/vnd.google-apps.folder'
+
+# ==========================================
+# 1. Storage Interface
+# ==========================================
+
+class CampaignStorage:
+    """
+    The folder/file operations campaign archiving needs. Ids are opaque strings
+    owned by the backend; `root_id` is the folder everything is archived under.
+    Listings return dicts with 'id' and 'name', like the Drive API does.
+
+    `tenant` (the user id) and `priority` say whose work this is to backends
+    with shared quota; see get_campaign_storage.
+    """
+
+    name = None
+    root_id = None
+    tenant = None
+    priority = INTERACTIVE
+
+    def find_folder(self, name, parent_id):
+        """Returns the id of the folder `name` inside `parent_id`, or None."""
+        raise NotImplementedError
+
+    def get_or_create_folder(self, name, parent_id):
+        """Returns the id of the folder `name` inside `parent_id`, creating it if needed."""
+        raise NotImplementedError
+
+    def list_folder(self, parent_id, name_contains=None, folders_only=False):
+        """Lists the children of `parent_id`, optionally filtered by name substring and type."""
+        raise NotImplementedError
+
+    def file_exists(self, name, parent_id):
+        raise NotImplementedError
+
+    def upload_file(self, name, parent_id, file_obj, mimetype='application/octet-stream'):
+        """Stores `file_obj` (read from its current position) as `name` inside `parent_id`."""
+        raise NotImplementedError
+
+    def download(self, file_id):
+        """Returns the file's contents as bytes."""
+        raise NotImplementedError
+
+    def share_link(self, file_id):
+        """
+        Makes the file readable by anyone with the link and returns that link,
+        or None if this backend cannot share files.
+        """
+        return None
+
+# ==========================================
+# 2. Google Drive Backend
+# ==========================================
+
+class GoogleDriveStorage(CampaignStorage):
+    """
+    Archives to the shared Drive folder GOOGLE_DRIVE_FOLDER_ID via GOOGLE_DRIVE_TOKEN_PATH.
+    Every request goes through the fair-share scheduler, as all users share that one account:
+    reads run at the storage's priority, writes always in the background.
+    """
+
+    name = 'google_drive'
+
+    def __init__(self, service=None):
+        self._service = service
+        self.root_id = settings.GOOGLE_DRIVE_FOLDER_ID
+
+    @property
+    def service(self):
+        # Built on first use, so pages that never touch Drive don't pay for it
+        if self._service is None:
+            from .utils import get_drive_service
+            self._service = get_drive_service()
+        return self._service
+
+    def _execute(self, request, write=False):
+        priority = BACKGROUND if write else self.priority
+        return run_drive_call(request.execute, tenant=self.tenant, priority=priority, idempotent=not write)
+
+    def find_folder(self, name, parent_id):
+        query = f"name='{name}' and mimeType='{FOLDER_MIMETYPE}' and '{parent_id}' in parents and trashed=false"
+        results = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)'))
+        items = results.get('files', [])
+        return items[0]['id'] if items else None
+
+    def get_or_create_folder(self, name, parent_id):
+        folder_id = self.find_folder(name, parent_id)
+        if folder_id:
+            return folder_id
+        metadata = {'name': name, 'mimeType': FOLDER_MIMETYPE, 'parents': [parent_id]}
+        try:
+            return self._execute(self.service.files().create(body=metadata, fields='id'), write=True).get('id')
+        except Exception as e:
+            if not is_retryable_google_error(e):
+                raise
+            # A 5xx can come after Drive created the folder; a duplicate would split the campaign lookups
+            folder_id = self.find_folder(name, parent_id)
+            if folder_id:
+                return folder_id
+            return self._execute(self.service.files().create(body=metadata, fields='id'), write=True).get('id')
+
+    def list_folder(self, parent_id, name_contains=None, folders_only=False):
+        query = f"'{parent_id}' in parents and trashed=false"
+        if name_contains:
+            query += f" and name contains '{name_contains}'"
+        if folders_only:
+            query += f" and mimeType='{FOLDER_MIMETYPE}'"
+        return self._execute(self.service.files().list(q=query, fields='files(id, name)')).get('files', [])
+
+    def file_exists(self, name, parent_id):
+        query = f"name='{name}' and '{parent_id}' in parents and trashed=false"
+        return bool(self._execute(self.service.files().list(q=query, fields='files(id)')).get('files', []))
+
+    def upload_file(self, name, parent_id, file_obj, mimetype='application/octet-stream'):
+        from googleapiclient.http import MediaIoBaseUpload
+        media = MediaIoBaseUpload(file_obj, mimetype=mimetype, resumable=False)
+        request = self.service.files().create(body={'name': name, 'parents': [parent_id]}, media_body=media, fields='id')
+        return self._execute(request, write=True).get('id')
+
+    def download(self, file_id):
+        from googleapiclient.http import MediaIoBaseDownload
+        request = self.service.files().get_media(fileId=file_id)
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request)
+        done = False
+        # Each chunk is its own request, so a long download doesn't hold a slot throughout
+        while not done: _, done = run_drive_call(downloader.next_chunk, tenant=self.tenant, priority=self.priority)
+        return fh.getvalue()
+
+    def share_link(self, file_id):
+        self._execute(self.service.permissions().create(fileId=file_id, body={'type': 'anyone', 'role': 'reader'}, fields='id'), write=True)
+        return self._execute(self.service.files().get(fileId=file_id, fields='webViewLink')).get('webViewLink')
+
+# ==========================================
+# 3. Local Filesystem Backend
+# ==========================================
+
+class LocalFileSystemStorage(CampaignStorage):
+    """
+    Archives under a local directory or mounted volume (CAMPAIGN_STORAGE_ROOT).
+    Ids are '/'-separated paths relative to that root, and the root itself is ''.
+    """
+
+    name = 'local'
+    root_id = ''
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or settings.CAMPAIGN_STORAGE_ROOT)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, item_id):
+        path = os.path.abspath(os.path.join(self.root, *item_id.split('/')))
+        # Ids come from our own listings, but never let one escape the root
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"Storage id '{item_id}' is outside the storage root.")
+        return path
+
+    @staticmethod
+    def _child_id(parent_id, name):
+        return f"{parent_id}/{name}" if parent_id else name
+
+    def find_folder(self, name, parent_id):
+        child_id = self._child_id(parent_id, name)
+        return child_id if os.path.isdir(self._path(child_id)) else None
+
+    def get_or_create_folder(self, name, parent_id):
+        child_id = self._child_id(parent_id, name)
+        os.makedirs(self._path(child_id), exist_ok=True)
+        return child_id
+
+    def list_folder(self, parent_id, name_contains=None, folders_only=False):
+        folder = self._path(parent_id)
+        if not os.path.isdir(folder):
+            return []
+        items = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if name_contains and name_contains not in entry.name:
+                    continue
+                if folders_only and not entry.is_dir():
+                    continue
+                items.append({'id': self._child_id(parent_id, entry.name), 'name': entry.name})
+        return items
+
+    def file_exists(self, name, parent_id):
+        return os.path.isfile(self._path(self._child_id(parent_id, name)))
+
+    def upload_file(self, name, parent_id, file_obj, mimetype='application/octet-stream'):
+        child_id = self._child_id(parent_id, name)
+        with open(self._path(child_id), 'wb') as out:
+            shutil.copyfileobj(file_obj, out)
+        return child_id
+
+    def download(self, file_id):
+        with open(self._path(file_id), 'rb') as f:
+            return f.read()
+
+
+CAMPAIGN_STORAGES = {
+    'google_drive': GoogleDriveStorage,
+    'local': LocalFileSystemStorage,
+}
+
+def get_campaign_storage(name=None, user=None, background=False):
+    """
+    Returns the campaign storage backend named by `name` or settings.CAMPAIGN_STORAGE,
+    acting for `user`. Pass background=True outside a page request (the send worker),
+    so its reads queue behind the apply page's.
+    """
+    name = name or settings.CAMPAIGN_STORAGE
+    if name not in CAMPAIGN_STORAGES:
+        raise ValueError(f"Unknown campaign storage '{name}'. Choose one of: {', '.join(CAMPAIGN_STORAGES)}.")
+    storage = CAMPAIGN_STORAGES[name]()
+    storage.tenant = getattr(user, 'pk', None)
+    storage.priority = BACKGROUND if background else INTERACTIVE
+    return storage
+
+# --- Download Helpers ---
+def get_text_from_storage(storage, file_id):
+    return storage.download(file_id).decode('utf-8')
+
+def get_file_from_storage(storage, file_id, filename):
+    """Downloads a stored file into a named in-memory file, ready to attach."""
+    fh = io.BytesIO(storage.download(file_id))
+    fh.name = filename
+    return fh
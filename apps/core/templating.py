@@ -0,0 +1,118 @@
+import re
+from operator import itemgetter
+
+# ==========================================
+# 1. Campaign Templates
+# ==========================================
+
+# {field} is a placeholder; {{ and }} are literal braces
+PLACEHOLDER_RE = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+# Available for every lead, whatever its source
+STANDARD_FIELDS = ('email', 'email_local', 'email_domain', 'company_name', 'website')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def column_field_name(label):
+    """Turns a lead-file header like 'Hiring Manager' into its placeholder name, hiring_manager."""
+    return re.sub(r"[^0-9a-z]+", "_", str(label).strip().lower()).strip("_")
+
+def lead_fields(leads):
+    """Every placeholder the given leads can fill: the standard fields plus their file's extra columns."""
+    fields = set(STANDARD_FIELDS)
+    for lead in leads:
+        fields.update(lead)
+    return fields
+
+
+class CompiledTemplate:
+    """
+    A subject or body parsed once into a list of literal chunks with a slot
+    between each pair for a placeholder value, plus a getter that pulls the
+    slot values out of a lead in one call. render() fills the slots with a
+    slice assignment and joins, so nothing is reparsed per lead.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.fields = []
+        literals = []
+        chunk = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(source):
+            chunk.append(source[position:match.start()])
+            if match.group(1):
+                literals.append("".join(chunk))
+                chunk = []
+                self.fields.append(match.group(1))
+            else:
+                # {{ or }}
+                chunk.append(match.group(0)[0])
+            position = match.end()
+        chunk.append(source[position:])
+        literals.append("".join(chunk))
+
+        # [literal, slot, literal, slot, ..., literal]
+        self.parts = [None] * (2 * len(self.fields) + 1)
+        self.parts[0::2] = literals
+
+        if not self.fields:
+            self._values = lambda context: ()
+        elif len(self.fields) == 1:
+            getter = itemgetter(self.fields[0])
+            self._values = lambda context: (getter(context),)
+        else:
+            self._values = itemgetter(*self.fields)
+
+    def render(self, context):
+        """Renders with a lead_context() dict."""
+        if not self.fields:
+            return self.parts[0]
+        out = self.parts[:]
+        out[1::2] = self._values(context)
+        return "".join(out)
+
+
+class CampaignTemplate:
+    """The compiled subject and body of one campaign."""
+
+    def __init__(self, subject, body):
+        self.subject = CompiledTemplate(subject)
+        self.body = CompiledTemplate(body)
+        self.fields = set(self.subject.fields) | set(self.body.fields)
+
+    def validate(self, leads):
+        """Raises TemplateError naming any placeholder the leads can't fill."""
+        fields = lead_fields(leads)
+        unknown = sorted(self.fields - fields)
+        if unknown:
+            placeholders = ", ".join(f"{{{name}}}" for name in unknown)
+            available = ", ".join(f"{{{name}}}" for name in sorted(fields))
+            raise TemplateError(f"Unknown placeholder(s) {placeholders}. Available: {available}.")
+
+    def lead_context(self, lead):
+        """The values this campaign's placeholders need, as strings, with missing columns empty."""
+        local, _, domain = lead["email"].partition("@")
+        context = {"email_local": local, "email_domain": domain}
+        context.update(lead)
+        for name in self.fields:
+            value = context.get(name)
+            if not isinstance(value, str):
+                context[name] = "" if value is None else str(value)
+        return context
+
+    def render(self, lead):
+        """Returns (subject, body) for one lead."""
+        context = self.lead_context(lead)
+        return self.subject.render(context), self.body.render(context)
+
+
+def compile_campaign(subject, body, leads=None):
+    """Compiles a campaign's subject and body, validating the placeholders against `leads` if given."""
+    template = CampaignTemplate(subject, body)
+    if leads is not None:
+        template.validate(leads)
+    return template
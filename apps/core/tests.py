@@ -1,3 +1,408 @@
-from django.test import TestCase
+import io
+import os
+import json
+import random
+import shutil
+import socket
+import tempfile
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from apps.accounts.models import ApiToken, GoogleOAuthProfile
+from . import fairshare
+from .scanner import EMAIL_PATTERN, EmailScanner, iter_email_matches, scan_emails
+from .sandbox import ExtractionBusy, guest_extraction_slot
+from .models import SendProgress, ScheduledCampaign, ScheduledLead
+from .sending import LINK_LARGE_FILES
+from .storage import LocalFileSystemStorage
+from .scheduler import claim_campaign, plan_send_times, run_due_campaigns
+from .transports import GmailAPITransport, SMTPTransport, build_message
+from .utils import extract_table_leads
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """aiosmtpd handler that keeps every message with the connection it came in on."""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.received = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if set(envelope.rcpt_tos) & self.reject:
+            return "550 Mailbox unavailable"
+        self.received.append((id(session), envelope))
+        return "250 OK"
+
+
+class SMTPTransportTests(SimpleTestCase):
+    """SMTPTransport against a local aiosmtpd server instead of Gmail."""
+
+    def start_server(self, handler):
+        from aiosmtpd.controller import Controller
+        port = free_port()
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+        return override_settings(
+            SMTP_HOST="127.0.0.1", SMTP_PORT=port, SMTP_USE_TLS=False, SMTP_USE_XOAUTH2=False,
+            SMTP_TIMEOUT_SECONDS=5,
+        )
+
+    def messages(self, count):
+        return [
+            build_message("me@example.com", f"lead{i}@example.com", f"Subject {i}", f"Hello lead {i}")
+            for i in range(count)
+        ]
+
+    def test_send_many_uses_one_connection(self):
+        handler = RecordingHandler()
+        with self.start_server(handler):
+            with SMTPTransport(None, "me@example.com") as transport:
+                results = transport.send_many(self.messages(5))
+
+        self.assertEqual([r["to"] for r in results], [f"lead{i}@example.com" for i in range(5)])
+        self.assertEqual(len(handler.received), 5)
+        self.assertEqual(len({session for session, _ in handler.received}), 1)
+        self.assertEqual([env.rcpt_tos for _, env in handler.received], [[f"lead{i}@example.com"] for i in range(5)])
+        self.assertIn(b"Subject: Subject 3", handler.received[3][1].content)
+        self.assertTrue(all(env.mail_from == "me@example.com" for _, env in handler.received))
+
+    def test_connection_is_recycled(self):
+        handler = RecordingHandler()
+        with self.start_server(handler), override_settings(SMTP_MESSAGES_PER_CONNECTION=2):
+            with SMTPTransport(None, "me@example.com") as transport:
+                transport.send_many(self.messages(5))
+
+        sessions = [session for session, _ in handler.received]
+        self.assertEqual(len(sessions), 5)
+        self.assertEqual(len(set(sessions)), 3)
+
+    def test_rejected_message_does_not_stop_the_rest(self):
+        handler = RecordingHandler(reject={"lead1@example.com"})
+        with self.start_server(handler):
+            with SMTPTransport(None, "me@example.com") as transport:
+                results = transport.send_many(self.messages(3))
+
+        self.assertIsNone(results[1])
+        self.assertEqual([results[0]["to"], results[2]["to"]], ["lead0@example.com", "lead2@example.com"])
+        self.assertEqual(len(handler.received), 2)
+
+
+class SendProgressClaimTests(TestCase):
+
+    def test_second_claim_is_refused_while_sending(self):
+        user = User.objects.create_user("sender", "sender@example.com")
+
+        progress = SendProgress.claim(user, 10)
+        self.assertEqual(progress.status, SendProgress.STATUS_SENDING)
+        self.assertIsNone(SendProgress.claim(user, 10))
+
+        progress.finish()
+        self.assertIsNotNone(SendProgress.claim(user, 10))
+
+
+class PlanSendTimesTests(TestCase):
+
+    @override_settings(GMAIL_DAILY_SEND_LIMIT=0)
+    def test_zero_daily_limit_is_rejected(self):
+        user = User.objects.create_user("planner", "planner@example.com")
+        with self.assertRaises(ImproperlyConfigured):
+            plan_send_times(user, 3)
+
+
+@override_settings(CAMPAIGN_STORAGE="local", CAMPAIGN_STORAGE_ROOT=tempfile.gettempdir())
+class CampaignApiStartTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("api", "api@example.com")
+        GoogleOAuthProfile.objects.create(user=self.user, access_token="token")
+        _, key = ApiToken.issue(self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {key}"}
+        response = self.client.post(
+            "/api/campaigns/", json.dumps({"subject": "Hi", "cover_letter": "Hello"}),
+            content_type="application/json", **self.auth
+        )
+        self.campaign_id = response.json()["campaign_id"]
+
+    def upload(self, body):
+        return self.client.post(f"/api/campaigns/{self.campaign_id}/leads/", body,
+                                content_type="application/x-ndjson", **self.auth)
+
+    def start(self):
+        return self.client.post(f"/api/campaigns/{self.campaign_id}/start/", **self.auth)
+
+    def test_campaign_starts_once_and_then_refuses_leads(self):
+        self.assertEqual(self.upload('{"email": "a@example.com"}\n').status_code, 200)
+
+        first = self.start()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["scheduled"], 1)
+        self.assertEqual(self.start().status_code, 409)
+        self.assertEqual(self.upload('{"email": "b@example.com"}\n').status_code, 409)
+        self.assertEqual(ScheduledLead.objects.filter(campaign_id=self.campaign_id).count(), 1)
+
+    def test_odd_field_values_are_converted_or_rejected_per_line(self):
+        lines = [
+            {"email": "number@example.com", "website": 123, "company_name": 42},
+            {"email": "list@example.com", "website": ["x.com"]},
+            {"email": "long@example.com", "company_name": "x" * 256},
+            {"email": "a" * 250 + "@example.com"},
+        ]
+        response = self.upload("".join(json.dumps(line) + "\n" for line in lines))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["accepted"], response.json()["rejected"]), (1, 3))
+        lead = ScheduledLead.objects.get(campaign_id=self.campaign_id)
+        self.assertEqual((lead.email, lead.company_name), ("number@example.com", "42"))
+
+
+class TableLeadsTests(SimpleTestCase):
+
+    def write_file(self, suffix, content=None):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        if content is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        return path
+
+    def test_each_sheet_has_its_own_header(self):
+        import openpyxl
+        wb = openpyxl.Workbook()
+        first = wb.active
+        first.append(["Name", "E-mail", "Company"])
+        first.append(["Jo", "jo@x.com", "X"])
+        second = wb.create_sheet()
+        second.append(["Email", "Company"])
+        second.append(["a@b.com", "B"])
+        path = self.write_file(".xlsx")
+        wb.save(path)
+
+        leads = list(extract_table_leads(path))
+        self.assertEqual([lead["email"] for lead in leads], ["jo@x.com", "a@b.com"])
+        self.assertEqual([lead["company_name"] for lead in leads], ["X", "B"])
+
+    def test_headerless_csv_is_scanned_cell_by_cell(self):
+        path = self.write_file(".csv", "Acme,hr@acme.com,acme.com\nGlobex,jobs@globex.com,\n")
+        leads = list(extract_table_leads(path))
+        self.assertEqual([lead["email"] for lead in leads], ["hr@acme.com", "jobs@globex.com"])
+
+    def test_row_without_email_in_its_column_is_scanned(self):
+        path = self.write_file(".csv", "Email,Company,Notes\n,Initech,write to careers@initech.com\n")
+        leads = list(extract_table_leads(path))
+        self.assertEqual([lead["email"] for lead in leads], ["careers@initech.com"])
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status, reason=""):
+        super().__init__(f"{status} {reason}")
+        self.resp = SimpleNamespace(status=status)
+        self.reason = reason
+
+
+class FakeGmailService:
+    """Records every messages.send; `outcomes` maps (recipient index, attempt) to an error to raise."""
+
+    def __init__(self, outcomes=None, batch_error=None):
+        self.outcomes = outcomes or {}
+        self.batch_error = batch_error
+        self.attempts = Counter()
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return body
+
+    def new_batch_http_request(self, callback):
+        service = self
+        requests = []
+
+        class Batch:
+            def add(self, request, request_id):
+                requests.append(request_id)
+
+            def execute(self):
+                for request_id in requests:
+                    attempt = service.attempts[request_id]
+                    service.attempts[request_id] += 1
+                    # A dropped connection loses every response, whatever Gmail did with the sends
+                    if not service.batch_error:
+                        error = service.outcomes.get((request_id, attempt))
+                        callback(request_id, None if error else {"id": request_id}, error)
+                if service.batch_error:
+                    raise service.batch_error
+        return Batch()
+
+
+@mock.patch("apps.core.transports.time.sleep")
+class GmailBatchRetryTests(SimpleTestCase):
+
+    def send(self, service, count=3):
+        transport = GmailAPITransport(None, "me@example.com")
+        transport.service = service
+        messages = [build_message("me@example.com", f"lead{i}@example.com", "Hi", "Hello") for i in range(count)]
+        return transport.send_many(messages)
+
+    def test_rate_limited_message_is_retried(self, _sleep):
+        service = FakeGmailService({("1", 0): FakeHttpError(429)})
+        results = self.send(service)
+        self.assertTrue(all(results))
+        self.assertEqual(service.attempts["1"], 2)
+
+    def test_server_error_is_not_resent(self, _sleep):
+        service = FakeGmailService({("1", 0): FakeHttpError(503)})
+        results = self.send(service)
+        self.assertIsNone(results[1])
+        self.assertEqual(service.attempts, Counter({"0": 1, "1": 1, "2": 1}))
+
+    def test_dropped_batch_connection_is_not_resent(self, _sleep):
+        service = FakeGmailService(batch_error=socket.timeout("timed out"))
+        self.assertEqual(self.send(service), [None, None, None])
+        self.assertEqual(service.attempts, Counter({"0": 1, "1": 1, "2": 1}))
+
+
+class RunDueCampaignsTests(TestCase):
+
+    def test_leads_sent_by_an_overlapping_run_are_not_sent_again(self):
+        user = User.objects.create_user("worker", "worker@example.com")
+        GoogleOAuthProfile.objects.create(user=user, access_token="token")
+        progress = SendProgress.objects.create(user=user, status=SendProgress.STATUS_SCHEDULED)
+        campaign = ScheduledCampaign.objects.create(user=user, progress=progress, subject="Hi", cover_letter="Hello")
+        now = timezone.now()
+        ScheduledLead.objects.create(campaign=campaign, email="a@example.com", send_after=now)
+
+        def claim_after_other_run(campaign, now):
+            # The other run finishes this lead and hands the campaign back just before our claim
+            campaign.leads.update(status=ScheduledLead.STATUS_SENT)
+            return claim_campaign(campaign, now)
+
+        with mock.patch("apps.core.scheduler.claim_campaign", side_effect=claim_after_other_run), \
+                mock.patch("apps.core.sending.send_to_leads") as send:
+            self.assertEqual(run_due_campaigns(now=now), 0)
+        send.assert_not_called()
+
+
+class ShuffledSharingStorage(LocalFileSystemStorage):
+    """Local storage that lists folders newest-first and can share files, like Drive might."""
+
+    def list_folder(self, parent_id, name_contains=None, folders_only=False):
+        return sorted(super().list_folder(parent_id, name_contains, folders_only), key=lambda item: item['name'], reverse=True)
+
+    def share_link(self, file_id):
+        return f"https://share.example/{file_id}"
+
+
+@override_settings(ATTACH_INLINE_MAX_MB=1)
+class ScheduledAttachmentLinkTests(TestCase):
+
+    def test_large_attachment_is_linked_to_its_own_archived_copy(self):
+        storage = ShuffledSharingStorage(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, storage.root)
+        folder = storage.get_or_create_folder("campaign_1", "")
+        storage.upload_file("attachment_1.pdf", folder, io.BytesIO(b"small"))
+        storage.upload_file("attachment_2.pdf", folder, io.BytesIO(b"x" * (2 * 1024 * 1024)))
+
+        user = User.objects.create_user("linker", "linker@example.com")
+        GoogleOAuthProfile.objects.create(user=user, access_token="token")
+        progress = SendProgress.objects.create(user=user, status=SendProgress.STATUS_SCHEDULED)
+        campaign = ScheduledCampaign.objects.create(
+            user=user, progress=progress, campaign_folder_id=folder, subject="Hi", cover_letter="Hello",
+            attachment_mode=LINK_LARGE_FILES,
+        )
+        ScheduledLead.objects.create(campaign=campaign, email="a@example.com", send_after=timezone.now())
+
+        with mock.patch("apps.core.storage.get_campaign_storage", return_value=storage), \
+                mock.patch("apps.core.sending.send_to_leads", return_value=(1, [])) as send:
+            run_due_campaigns()
+
+        cover_letter = send.call_args.args[4]
+        attachments = send.call_args.kwargs["attachments"]
+        self.assertIn("attachment_2.pdf: https://share.example/campaign_1/attachment_2.pdf", cover_letter)
+        self.assertEqual([att.name for att in attachments], ["attachment_1.pdf"])
+
+
+class DriveSlotCounterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.delete("test:slots")
+        self.addCleanup(cache.delete, "test:slots")
+
+    def test_counter_outlives_its_first_ttl_while_slots_are_taken(self):
+        now = 1_000_000.0
+        with mock.patch("time.time", lambda: now):
+            fairshare._incr("test:slots", 10)
+            now += 8
+            fairshare._incr("test:slots", 10)
+            now += 8  # Past the TTL set when the key was created
+            self.assertEqual(fairshare._incr("test:slots", 10), 3)
+
+    def test_release_after_expiry_never_goes_negative(self):
+        fairshare._incr("test:slots", 10)
+        cache.delete("test:slots")  # Expired with the slot held
+        fairshare._incr("test:slots", 10)
+        fairshare._decr("test:slots")
+        fairshare._decr("test:slots")
+        self.assertEqual(cache.get("test:slots"), 0)
+        self.assertEqual(fairshare._incr("test:slots", 10), 1)
+
+
+@override_settings(GUEST_EXTRACT_TIMEOUT_SECONDS=20, GUEST_EXTRACT_MAX_PER_IP=2, GUEST_EXTRACT_MAX_CONCURRENT=10)
+class GuestExtractionSlotTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.delete_many(["guest_extract:ip:10.0.0.1", "guest_extract:global"])
+
+    def test_per_ip_cap_holds_past_the_first_ttl(self):
+        request = SimpleNamespace(META={"REMOTE_ADDR": "10.0.0.1"})
+        now = 1_000_000.0
+        with mock.patch("time.time", lambda: now):
+            with guest_extraction_slot(request):
+                now += 30
+                with guest_extraction_slot(request):
+                    now += 30  # Past the TTL set when the first slot was taken
+                    with self.assertRaises(ExtractionBusy):
+                        with guest_extraction_slot(request):
+                            pass
+            self.assertEqual(cache.get("guest_extract:ip:10.0.0.1"), 0)
+
+
+class EmailScannerTests(SimpleTestCase):
+
+    def random_texts(self, count=2000):
+        rng = random.Random(0)
+        for _ in range(count):
+            text = "".join(rng.choice("ab.-_%+@ \nXY1") for _ in range(rng.randint(0, 120)))
+            # Some local parts longer than the scanner's fast look-back
+            yield rng, text.replace("Y", "x" * rng.choice([1, 70]))
+
+    def test_matches_equal_findall(self):
+        for _, text in self.random_texts():
+            self.assertEqual(list(iter_email_matches(text)), EMAIL_PATTERN.findall(text), text)
+
+    def test_chunked_feed_equals_whole_text(self):
+        with mock.patch("apps.core.scanner.SCAN_BLOCK_CHARS", 8):
+            for rng, text in self.random_texts():
+                scanner = EmailScanner()
+                start = 0
+                while start < len(text):
+                    end = start + rng.randint(1, 10)
+                    scanner.feed(text[start:end])
+                    start = end
+                self.assertEqual(scanner.finish(), scan_emails(text), text)
@@ -0,0 +1,275 @@
+import os
+import time
+import base64
+import smtplib
+import mimetypes
+from email.message import EmailMessage
+from django.conf import settings
+
+# ==========================================
+# 1. Message Building
+# ==========================================
+
+def build_message(sender_email, to_email, subject, body_text, resume_pdf=None, attachments=None):
+    """Builds the MIME message every transport sends."""
+    message = EmailMessage()
+    message['To'] = to_email
+    message['From'] = sender_email
+    message['Subject'] = subject
+    message.set_content(body_text)
+
+    if resume_pdf:
+        resume_pdf.seek(0)
+        message.add_attachment(
+            resume_pdf.read(), maintype='application', subtype='pdf', filename=resume_pdf.name
+        )
+
+    if attachments:
+        for file in attachments:
+            file.seek(0)
+            ctype, _ = mimetypes.guess_type(file.name)
+            if ctype is None: ctype = 'application/octet-stream'
+            maintype, subtype = ctype.split('/', 1)
+            message.add_attachment(
+                file.read(), maintype=maintype, subtype=subtype, filename=os.path.basename(file.name)
+            )
+
+    return message
+
+# ==========================================
+# 2. Transports
+# ==========================================
+
+class EmailTransport:
+    """
+    Sends many messages for one sender. Use as a context manager so backends
+    can hold a connection open for the whole campaign:
+
+        with get_transport(credentials, sender_email) as transport:
+            for message in messages:
+                transport.send(message)
+
+    send() returns a truthy result on success and None on failure, like
+    send_gmail_message always has. `batch_size` is how many messages a
+    caller should hand to send_many() at once.
+    """
+
+    batch_size = 1
+
+    def __init__(self, credentials, sender_email):
+        self.credentials = credentials
+        self.sender_email = sender_email
+
+    def open(self):
+        pass
+
+    def send(self, message):
+        raise NotImplementedError("Email transports must implement send().")
+
+    def send_many(self, messages):
+        """Sends a group of messages, returning one result (or None) per message, in order."""
+        return [self.send(message) for message in messages]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_rate_limit_google_error(exc):
+    """True for 429 and 403 rate-limit answers, which mean the request was refused unapplied."""
+    status = getattr(getattr(exc, 'resp', None), 'status', None)
+    if status == 429:
+        return True
+    if status == 403:
+        details = f"{getattr(exc, 'reason', '')} {getattr(exc, 'error_details', '')}".lower()
+        return 'ratelimitexceeded' in details or 'rate limit' in details
+    return False
+
+def is_retryable_google_error(exc):
+    """True for Google API errors worth retrying: rate limits and transient server errors."""
+    status = getattr(getattr(exc, 'resp', None), 'status', None)
+    return status in (500, 502, 503, 504) or is_rate_limit_google_error(exc)
+
+
+class GmailAPITransport(EmailTransport):
+    """
+    Sends through users().messages().send. send_many() groups messages into
+    googleapiclient batch requests (GMAIL_BATCH_SIZE messages, at most
+    GMAIL_BATCH_MAX_BYTES of encoded mail each), so many sends share one HTTP
+    round-trip. Batches are paced to the per-user quota, and rate-limited
+    messages are retried with backoff. messages.send isn't idempotent, so a
+    5xx or dropped connection (Gmail may have sent it anyway) is a failure.
+    """
+
+    # messages.send costs 100 quota units out of 250 per user per second
+    SEND_QUOTA_UNITS = 100
+    USER_QUOTA_UNITS_PER_SECOND = 250
+
+    def __init__(self, credentials, sender_email):
+        super().__init__(credentials, sender_email)
+        self.batch_size = settings.GMAIL_BATCH_SIZE
+        self.next_batch_at = 0
+
+    def open(self):
+        from googleapiclient.discovery import build
+        self.service = build('gmail', 'v1', credentials=self.credentials)
+
+    def send(self, message):
+        if not hasattr(self, 'service'):
+            self.open()
+        encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+        try:
+            return self.service.users().messages().send(userId="me", body={'raw': encoded_message}).execute()
+        except Exception as e:
+            print(f"Error sending to {message['To']}: {e}")
+            return None
+
+    def send_many(self, messages):
+        if not hasattr(self, 'service'):
+            self.open()
+        encoded = [base64.urlsafe_b64encode(message.as_bytes()).decode() for message in messages]
+        results = [None] * len(messages)
+
+        pending = list(range(len(messages)))
+        for attempt in range(settings.GMAIL_BATCH_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(2 ** attempt)
+            retry = []
+            for group in self._group(pending, encoded):
+                retry.extend(self._execute_batch(group, encoded, messages, results))
+            pending = retry
+            if not pending:
+                break
+
+        for index in pending:
+            print(f"Error sending to {messages[index]['To']}: gave up after {settings.GMAIL_BATCH_MAX_RETRIES} retries")
+        return results
+
+    def _group(self, indexes, encoded):
+        """Splits message indexes into batches bounded by count and encoded size."""
+        group, group_bytes = [], 0
+        for index in indexes:
+            size = len(encoded[index])
+            if group and (len(group) >= self.batch_size or group_bytes + size > settings.GMAIL_BATCH_MAX_BYTES):
+                yield group
+                group, group_bytes = [], 0
+            group.append(index)
+            group_bytes += size
+        if group:
+            yield group
+
+    def _execute_batch(self, group, encoded, messages, results):
+        """Runs one batch request and returns the indexes that should be retried."""
+        retry = []
+
+        def callback(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index] = response
+            elif is_rate_limit_google_error(exception):
+                retry.append(index)
+            else:
+                print(f"Error sending to {messages[index]['To']}: {exception}")
+
+        # Pace batches so the whole group fits inside the per-user send quota
+        wait = self.next_batch_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.next_batch_at = time.monotonic() + len(group) * self.SEND_QUOTA_UNITS / self.USER_QUOTA_UNITS_PER_SECOND
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for index in group:
+            batch.add(self.service.users().messages().send(userId="me", body={'raw': encoded[index]}), request_id=str(index))
+        try:
+            batch.execute()
+        except Exception as e:
+            # The whole batch request failed. Only a rate limit proves nothing was sent; after a
+            # 5xx or a dropped connection Gmail may have delivered some, so don't send them again
+            if is_rate_limit_google_error(e):
+                return [index for index in group if results[index] is None and index not in retry] + retry
+            for index in group:
+                if results[index] is None and index not in retry:
+                    print(f"Error sending to {messages[index]['To']}: {e}")
+            return retry
+        return retry
+
+
+class SMTPTransport(EmailTransport):
+    """
+    Keeps one SMTP connection open and pushes many messages through it,
+    authenticating with XOAUTH2 from the user's Google credentials. The
+    connection is recycled every SMTP_MESSAGES_PER_CONNECTION messages and
+    re-opened once if the server drops it mid-campaign.
+
+    Gmail only accepts XOAUTH2 tokens carrying the https://mail.google.com/
+    scope. For local runs, point SMTP_HOST/SMTP_PORT at a debugging server
+    (e.g. `python -m aiosmtpd -n -l localhost:1025`) and turn off
+    SMTP_USE_TLS and SMTP_USE_XOAUTH2.
+    """
+
+    def __init__(self, credentials, sender_email):
+        super().__init__(credentials, sender_email)
+        self.connection = None
+        self.sent_on_connection = 0
+
+    def open(self):
+        self.connection = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        self.connection.ehlo()
+        if settings.SMTP_USE_TLS:
+            self.connection.starttls()
+            self.connection.ehlo()
+        if settings.SMTP_USE_XOAUTH2:
+            self.authenticate()
+        self.sent_on_connection = 0
+
+    def authenticate(self):
+        if not self.credentials.valid:
+            from google.auth.transport.requests import Request
+            self.credentials.refresh(Request())
+        auth_string = f"user={self.sender_email}\1auth=Bearer {self.credentials.token}\1\1"
+        self.connection.auth('XOAUTH2', lambda challenge=None: auth_string, initial_response_ok=True)
+
+    def send(self, message):
+        try:
+            if self.connection is None or self.sent_on_connection >= settings.SMTP_MESSAGES_PER_CONNECTION:
+                self.close()
+                self.open()
+            try:
+                self.connection.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self.open()
+                self.connection.send_message(message)
+            self.sent_on_connection += 1
+            return {'to': message['To']}
+        except Exception as e:
+            print(f"Error sending to {message['To']}: {e}")
+            return None
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except smtplib.SMTPException:
+                self.connection.close()
+            except OSError:
+                pass
+            self.connection = None
+
+
+EMAIL_TRANSPORTS = {
+    'gmail_api': GmailAPITransport,
+    'smtp': SMTPTransport,
+}
+
+def get_transport(credentials, sender_email, name=None):
+    """Returns the transport named by `name` or settings.EMAIL_TRANSPORT."""
+    name = name or settings.EMAIL_TRANSPORT
+    if name not in EMAIL_TRANSPORTS:
+        raise ValueError(f"Unknown email transport '{name}'. Choose one of: {', '.join(EMAIL_TRANSPORTS)}.")
+    return EMAIL_TRANSPORTS[name](credentials, sender_email)
@@ -0,0 +1,141 @@
+import struct
+import hashlib
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler, TemporaryFileUploadHandler, SkipFile
+)
+
+# ==========================================
+# 1. Content Sniffing
+# ==========================================
+
+# (magic prefix, mime type) pairs, checked against the first bytes of the upload
+MAGIC_SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),  # .docx / .xlsx are zip containers
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),  # legacy .doc / .xls
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\x7fELF', 'application/x-executable'),
+    (b'\xcf\xfa\xed\xfe', 'application/x-mach-binary'),
+]
+
+SNIFF_BYTES = 512
+
+def is_pe_executable(head):
+    """
+    True for a Windows executable: 'MZ' alone also starts plenty of text lead
+    lists ("MZ Consulting, hr@..."), so require e_lfanew to point at 'PE\\0\\0'.
+    """
+    if not head.startswith(b'MZ') or len(head) < 0x40:
+        return False
+    pe_offset = struct.unpack_from('<I', head, 0x3c)[0]
+    return head[pe_offset:pe_offset + 4] == b'PE\x00\x00'
+
+def sniff_content_type(head):
+    """Guesses a mime type from the first bytes of a file, ignoring the client's claim."""
+    if is_pe_executable(head):
+        return 'application/x-msdownload'
+    for magic, mime in MAGIC_SIGNATURES:
+        if head.startswith(magic):
+            return mime
+    if not head:
+        return 'application/x-empty'
+    # Treat it as text if the sample decodes cleanly and has no NUL bytes
+    if b'\x00' not in head:
+        try:
+            head.decode('utf-8')
+            return 'text/plain'
+        except UnicodeDecodeError as e:
+            # A multi-byte character may have been cut off at the sample boundary
+            if e.start >= len(head) - 3:
+                return 'text/plain'
+    return 'application/octet-stream'
+
+def get_upload_errors(request):
+    """Returns {field_name: message} for files the upload handlers refused."""
+    return getattr(request, 'upload_errors', {})
+
+# ==========================================
+# 2. Hash-While-Uploading Handlers
+# ==========================================
+
+class HashingUploadMixin:
+    """
+    Computes SHA-256, size and the sniffed mime type while Django streams the
+    upload, and rejects oversized or blocked files on the first offending chunk.
+
+    The results are attached to the returned UploadedFile as `sha256` and
+    `sniffed_content_type`, so nothing downstream has to read the file again.
+    """
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        self.head = b''
+        self.received = 0
+        self.max_mb = settings.UPLOAD_FIELD_MAX_SIZE_MB.get(field_name, settings.UPLOAD_MAX_FILE_SIZE_MB)
+
+        # Reject up front when the client is honest about the part size
+        if content_length is not None and content_length > self.max_bytes():
+            self.reject(field_name, file_name, self.size_error(file_name))
+
+        super().new_file(field_name, file_name, content_type, content_length, *args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.is_storing():
+            self.received += len(raw_data)
+            if self.received > self.max_bytes():
+                self.reject(self.field_name, self.file_name, self.size_error(self.file_name))
+
+            if len(self.head) < SNIFF_BYTES:
+                first_chunk = not self.head
+                self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+                # Blocked types are all identified by their magic prefix
+                if first_chunk:
+                    self.check_content_type()
+
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file_obj = super().file_complete(file_size)
+        if file_obj is not None:
+            file_obj.sha256 = self.hasher.hexdigest()
+            file_obj.sniffed_content_type = sniff_content_type(self.head)
+        return file_obj
+
+    def is_storing(self):
+        """Only the handler that keeps the bytes should hash them."""
+        return True
+
+    def max_bytes(self):
+        return int(self.max_mb * 1024 * 1024)
+
+    def size_error(self, file_name):
+        return f"'{file_name}' is larger than the {self.max_mb} MB upload limit."
+
+    def check_content_type(self):
+        mime = sniff_content_type(self.head)
+        if mime in settings.UPLOAD_BLOCKED_CONTENT_TYPES:
+            self.reject(self.field_name, self.file_name, f"'{self.file_name}' is not an allowed file type.")
+
+    def reject(self, field_name, file_name, message):
+        if self.request is not None:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = {}
+            self.request.upload_errors.setdefault(field_name, message)
+        raise SkipFile(message)
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    """In-memory storage for small uploads (mirrors MemoryFileUploadHandler)."""
+
+    def is_storing(self):
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    """Temp-file storage for large uploads (mirrors TemporaryFileUploadHandler)."""
+    pass
@@ -1,10 +1,21 @@
 from django.urls import path
-from . import views
+from . import views, api, analytics
 
 app_name = "core"
 
 urlpatterns = [
     path("", views.landing_view, name="landing"),
     path("apply/", views.apply_view, name="apply"),
+    path("apply/progress/", views.send_progress_view, name="send_progress"),
+    path("apply/progress/<int:progress_id>/", views.send_progress_view, name="send_progress_detail"),
     path("guest/test/", views.guest_extract_view, name="guest_extract"), # The new dedicated guest URL
+
+    # Staff-only CSV export of the send rollups
+    path("analytics/export/", analytics.analytics_export_view, name="analytics_export"),
+
+    # Bulk campaign API (bearer-token auth)
+    path("api/campaigns/", api.api_campaigns_view, name="api_campaigns"),
+    path("api/campaigns/<int:campaign_id>/", api.api_campaign_detail_view, name="api_campaign_detail"),
+    path("api/campaigns/<int:campaign_id>/leads/", api.api_campaign_leads_view, name="api_campaign_leads"),
+    path("api/campaigns/<int:campaign_id>/start/", api.api_campaign_start_view, name="api_campaign_start"),
 ]
\ No newline at end of file
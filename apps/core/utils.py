@@ -2,194 +2,340 @@ import os
 import re
 import io
 import hashlib
+import itertools
 from django.conf import settings
-import tldextract
-import pdfplumber
-from email.message import EmailMessage
-import base64
 import mimetypes
 
-# Google API Imports
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from google.oauth2.credentials import Credentials
+from .scanner import EMAIL_PATTERN, EmailScanner
+
+# Heavy dependencies (pdfplumber, tldextract, the Google API client) are imported
+# inside the functions that use them, so worker boot and manage.py stay fast.
+# Measure with: python benchmarks/startup_time.py
 
 # ==========================================
 # 1. Extraction & Email Utils
 # ==========================================
 
-def extract_text_from_document(file_path):
-    """Dynamically parses text based on file extension."""
+class ExtractionLimitExceeded(ValueError):
+    """The upload blew through a CPU, memory, page or time budget."""
+    pass
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_TEXT_TAGS = [WORD_NS + tag for tag in ("t", "tab", "br", "cr", "p", "tc", "tr", "tbl")]
+
+def iter_docx_text(file_path):
+    """
+    Streams paragraph text out of a .docx without building the whole document:
+    the body (tables included), then headers, footers and footnotes are read
+    straight from the zip with an incremental XML parser.
+    """
+    import zipfile
+    from lxml import etree  # ships with python-docx
+
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        parts = ['word/document.xml'] + sorted(
+            name for name in names
+            if re.fullmatch(r"word/(header|footer)\d*\.xml|word/(footnotes|endnotes)\.xml", name)
+        )
+        for part in parts:
+            if part not in names:
+                continue
+            with archive.open(part) as xml_stream:
+                pieces = []
+                for _, elem in etree.iterparse(xml_stream, events=("end",), tag=DOCX_TEXT_TAGS, resolve_entities=False):
+                    tag = elem.tag
+                    if tag == WORD_NS + "t":
+                        pieces.append(elem.text or "")
+                        continue
+                    if tag == WORD_NS + "tab":
+                        pieces.append("\t")
+                        continue
+                    if tag in (WORD_NS + "br", WORD_NS + "cr"):
+                        pieces.append("\n")
+                        continue
+                    if tag == WORD_NS + "p":
+                        yield "".join(pieces)
+                        pieces = []
+
+                    # Drop finished blocks (and their earlier siblings) so memory stays bounded
+                    elem.clear(keep_tail=True)
+                    parent = elem.getparent()
+                    if parent is not None:
+                        while elem.getprevious() is not None:
+                            del parent[0]
+
+def iter_document_text(file_path, max_pages=None):
+    """
+    Streams a document's text in chunks (PDF pages, .docx paragraphs, sheet rows,
+    blocks of a text file), so callers can scan it without holding it all.
+    `max_pages` caps PDF page counts.
+    """
     ext = os.path.splitext(file_path)[1].lower()
-    raw_text = ""
     try:
         if ext == '.pdf':
+            import pdfplumber
             with pdfplumber.open(file_path) as pdf:
+                if max_pages is not None and len(pdf.pages) > max_pages:
+                    raise ExtractionLimitExceeded(f"The PDF has {len(pdf.pages)} pages; the limit is {max_pages}.")
                 for page in pdf.pages:
                     text = page.extract_text()
-                    if text: raw_text += text + "\n"
+                    # pdfplumber caches every parsed page until the file closes; drop each one as we go
+                    page.close()
+                    if text: yield text + "\n"
         elif ext in ['.txt', '.csv']:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                raw_text = f.read()
+                while True:
+                    block = f.read(1 << 20)
+                    if not block:
+                        break
+                    yield block
         elif ext in ['.doc', '.docx']:
-            import docx
-            doc = docx.Document(file_path)
-            raw_text = "\n".join([para.text for para in doc.paragraphs])
+            for paragraph in iter_docx_text(file_path):
+                yield paragraph + "\n"
         elif ext in ['.xls', '.xlsx']:
             if ext == '.xls':
                 raise ValueError("Applymatic requires the modern .xlsx Excel format. Please open your .xls file, click 'Save As', choose '.xlsx', and try again!")
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            for sheet in wb.worksheets:
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join([str(cell) for cell in row if cell is not None])
-                    raw_text += row_text + "\n"
+            for row in iter_table_rows(file_path):
+                yield " ".join([str(cell) for cell in row if cell is not None]) + "\n"
         else:
             raise ValueError("Unsupported file format.")
+    except (ExtractionLimitExceeded, MemoryError):
+        raise
     except Exception as e:
         raise ValueError(f"Failed to parse file: {str(e)}")
-    
-    return raw_text
 
-def extract_leads(file_path=None, manual_text=""):
-    """Combines text from file and manual input, then extracts emails."""
-    raw_text = manual_text + "\n"
-    
-    if file_path and os.path.exists(file_path):
-        raw_text += extract_text_from_document(file_path)
+def extract_text_from_document(file_path, max_pages=None):
+    """Dynamically parses text based on file extension. `max_pages` caps PDF page counts."""
+    return "".join(iter_document_text(file_path, max_pages=max_pages))
 
-    EMAIL_RE = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
-    raw_emails = list(set(re.findall(EMAIL_RE, raw_text)))
+# Formats whose column structure we keep instead of flattening to text
+TABULAR_EXTENSIONS = ['.csv', '.xlsx']
 
-    leads = []
-    for email in raw_emails:
-        ext = tldextract.extract(email.split('@')[1])
-        domain = f"{ext.domain}.{ext.suffix}"
-        company_name = ext.domain.replace('-', ' ').title()
+# Substrings that identify a header cell, checked against the lowercased header
+# (ordered so "Company Website" / "Company Email" aren't taken as the company name)
+LEAD_COLUMN_KEYWORDS = {
+    "email": ["email", "e-mail", "mail"],
+    "website": ["website", "web site", "url", "domain", "homepage", "site"],
+    "company_name": ["company", "organization", "organisation", "employer", "business", "firm"],
+}
 
-        leads.append({
-            "email": email.lower(),
-            "website": domain,
-            "company_name": company_name
-        })
+def iter_csv_rows(file_path):
+    import csv
+    with open(file_path, 'r', encoding='utf-8-sig', errors='ignore', newline='') as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        for row in csv.reader(f, dialect):
+            yield tuple(row)
+
+def iter_table_sheets(file_path):
+    """
+    Streams each sheet of a .csv or .xlsx file as an iterator of rows (tuples
+    of cell values), in constant memory. A CSV is a single sheet.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.csv':
+        yield iter_csv_rows(file_path)
+    elif ext == '.xlsx':
+        import openpyxl
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet in wb.worksheets:
+                yield sheet.iter_rows(values_only=True)
+        finally:
+            wb.close()
+    else:
+        raise ValueError("Unsupported file format.")
+
+def iter_table_rows(file_path):
+    """The rows of every sheet of a .csv or .xlsx file, one after another."""
+    for rows in iter_table_sheets(file_path):
+        yield from rows
+
+def detect_lead_columns(header):
+    """
+    Maps 'email' / 'company_name' / 'website' to column indexes of a header row.
+    Every other labelled column is mapped under its placeholder name (see
+    templating.column_field_name), so templates can use custom columns.
+    """
+    from .templating import column_field_name, STANDARD_FIELDS
+    columns = {}
+    extra = {}
+    for index, cell in enumerate(header):
+        label = str(cell).strip().lower() if cell is not None else ""
+        if not label:
+            continue
+        for field, keywords in LEAD_COLUMN_KEYWORDS.items():
+            if field not in columns and any(word in label for word in keywords):
+                columns[field] = index
+                break
+        else:
+            name = column_field_name(label)
+            if name and name not in STANDARD_FIELDS and name not in extra:
+                extra[name] = index
+    for name, index in extra.items():
+        columns.setdefault(name, index)
+    return columns
+
+def build_lead(email, company_name=None, website=None, extra=None):
+    """
+    Builds a lead dict, inferring whatever the source didn't provide from the
+    domain. `extra` holds custom columns for templates, and never overrides
+    the standard fields.
+    """
+    import tldextract
+    ext = tldextract.extract(email.split('@')[1])
+    if website:
+        site = tldextract.extract(website)
+        website = f"{site.domain}.{site.suffix}" if site.suffix else None
+
+    lead = dict(extra) if extra else {}
+    lead.update({
+        "email": email.lower(),
+        "website": website or f"{ext.domain}.{ext.suffix}",
+        "company_name": company_name or ext.domain.replace('-', ' ').title()
+    })
+    return lead
+
+def extract_table_leads(file_path):
+    """
+    Streams a .csv/.xlsx file row by row and emits leads straight from its columns.
+    Each sheet's header row naming email/company/website columns is used when
+    present; otherwise (and for rows whose email cell holds none) every cell
+    of a row is scanned for emails.
+    """
+    email_re = EMAIL_PATTERN
+    seen = set()
 
-    return leads
+    try:
+        for rows in iter_table_sheets(file_path):
+            columns = None
+            for row in rows:
+                cells = ["" if cell is None else str(cell).strip() for cell in row]
+                if not any(cells):
+                    continue
+
+                if columns is None:
+                    # The sheet's first non-empty row decides: a header if it has labels but no emails
+                    columns = {}
+                    if not any(email_re.search(cell) for cell in cells):
+                        columns = detect_lead_columns(cells)
+                        continue
+
+                def cell_at(field):
+                    index = columns.get(field)
+                    return cells[index] if index is not None and index < len(cells) else ""
+
+                emails = email_re.findall(cell_at("email")) or email_re.findall(" ".join(cells))
+                for email in emails:
+                    key = email.lower()
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    extra = {field: cell_at(field) for field in columns if field not in LEAD_COLUMN_KEYWORDS}
+                    yield build_lead(email, company_name=cell_at("company_name"), website=cell_at("website"), extra=extra)
+    except (ValueError, MemoryError):
+        raise
+    except Exception as e:
+        raise ValueError(f"Failed to parse file: {str(e)}")
 
-def send_gmail_message(credentials, sender_email, to_email, subject, body_text, resume_pdf=None, attachments=None):
-    message = EmailMessage()
-    message['To'] = to_email
-    message['From'] = sender_email
-    message['Subject'] = subject
-    message.set_content(body_text)
+def extract_leads(file_path=None, manual_text="", max_pages=None):
+    """
+    Combines leads from the file and manual input. Emails are deduplicated
+    case-insensitively and keep the order they first appear in.
+    """
+    table_leads = []
+    text_chunks = [manual_text + "\n"]
 
-    if resume_pdf:
-        resume_pdf.seek(0)
-        message.add_attachment(
-            resume_pdf.read(), maintype='application', subtype='pdf', filename=resume_pdf.name
-        )
+    if file_path and os.path.exists(file_path):
+        if os.path.splitext(file_path)[1].lower() in TABULAR_EXTENSIONS:
+            table_leads = list(extract_table_leads(file_path))
+        else:
+            text_chunks = itertools.chain(text_chunks, iter_document_text(file_path, max_pages=max_pages))
 
-    if attachments:
-        for file in attachments:
-            file.seek(0)
-            ctype, _ = mimetypes.guess_type(file.name)
-            if ctype is None: ctype = 'application/octet-stream'
-            maintype, subtype = ctype.split('/', 1)
-            message.add_attachment(
-                file.read(), maintype=maintype, subtype=subtype, filename=os.path.basename(file.name)
-            )
+    scanner = EmailScanner(seen=(lead["email"] for lead in table_leads))
+    for chunk in text_chunks:
+        scanner.feed(chunk)
 
-    encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-    create_message = {'raw': encoded_message}
+    leads = list(table_leads)
+    for email in scanner.finish():
+        leads.append(build_lead(email))
 
-    service = build('gmail', 'v1', credentials=credentials)
-    try:
-        return service.users().messages().send(userId="me", body=create_message).execute()
-    except Exception as e:
-        print(f"Error sending to {to_email}: {e}")
-        return None
+    return leads
+
+def send_gmail_message(credentials, sender_email, to_email, subject, body_text, resume_pdf=None, attachments=None):
+    """Sends a single message through the Gmail API. Campaigns should hold a transport open instead."""
+    from .transports import build_message, GmailAPITransport
+    message = build_message(sender_email, to_email, subject, body_text, resume_pdf=resume_pdf, attachments=attachments)
+    with GmailAPITransport(credentials, sender_email) as transport:
+        return transport.send(message)
 
 # ==========================================
-# 2. Google Drive Storage Utils
+# 2. Campaign Storage Utils
 # ==========================================
 
 def get_drive_service():
     """Initializes the connection using your human token."""
+    from googleapiclient.discovery import build
+    from google.oauth2.credentials import Credentials
     creds = Credentials.from_authorized_user_file(
         settings.GOOGLE_DRIVE_TOKEN_PATH, 
         scopes=['https://www.googleapis.com/auth/drive']
     )
     return build('drive', 'v3', credentials=creds)
 
-def get_or_create_drive_folder(service, folder_name, parent_id):
-    """Finds a folder in Drive, or creates it if it doesn't exist."""
-    query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
-    results = service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-    items = results.get('files', [])
-    if items:
-        return items[0]['id']
-    
-    metadata = {'name': folder_name, 'mimeType': 'application/vnd.google-apps.folder', 'parents': [parent_id]}
-    return service.files().create(body=metadata, fields='id').execute().get('id')
-
 def get_file_hash(file_obj):
+    # Uploads already carry their digest from the hashing upload handler
+    if getattr(file_obj, 'sha256', None):
+        return file_obj.sha256
+
     hasher = hashlib.sha256()
     file_obj.seek(0)
     for chunk in file_obj.chunks(): hasher.update(chunk)
     file_obj.seek(0)
     return hasher.hexdigest()
 
-def save_campaign_records(user, companies_file, cover_letter_text, resume_pdf, attachments, subject):
-    service = get_drive_service()
-    master_folder_id = settings.GOOGLE_DRIVE_FOLDER_ID # You must add this to settings.py!
+def get_campaign_base_name(user):
+    """The per-user prefix campaign folders are numbered under, e.g. 'jane_doe'."""
+    first = user.first_name.strip().lower() if user.first_name else ""
+    last = user.last_name.strip().lower() if user.last_name else ""
+    return f"{first}_{last}" if first and last else (user.email.split('@')[0].replace('.', '_') if user.email else "user_campaign")
+
+def save_campaign_records(user, companies_file, cover_letter_text, resume_pdf, attachments, subject, storage=None):
+    from .storage import get_campaign_storage
+    storage = storage or get_campaign_storage(user=user)
+    master_folder_id = storage.root_id
 
-    # 1. Save Companies File (Check if hash already exists in Drive)
+    # 1. Save Companies File (Check if hash already exists in storage)
     if companies_file:
-        companies_folder_id = get_or_create_drive_folder(service, 'companies', master_folder_id)
+        companies_folder_id = storage.get_or_create_folder('companies', master_folder_id)
         comp_hash = get_file_hash(companies_file)
         comp_ext = os.path.splitext(companies_file.name)[1]
         comp_filename = f"{comp_hash}{comp_ext}"
 
-        query = f"name='{comp_filename}' and '{companies_folder_id}' in parents and trashed=false"
-        existing_comp = service.files().list(q=query, fields='files(id)').execute().get('files', [])
-        
-        if not existing_comp:
+        if not storage.file_exists(comp_filename, companies_folder_id):
             companies_file.seek(0)
-            media = MediaIoBaseUpload(companies_file, mimetype='application/octet-stream', resumable=False)
-            service.files().create(body={'name': comp_filename, 'parents': [companies_folder_id]}, media_body=media).execute()
-
-    # 2. Setup User's Base Folder Name
-    campaigns_folder_id = get_or_create_drive_folder(service, 'campaigns', master_folder_id)
-    first = user.first_name.strip().lower() if user.first_name else ""
-    last = user.last_name.strip().lower() if user.last_name else ""
-    base_folder_name = f"{first}_{last}" if first and last else (user.email.split('@')[0].replace('.', '_') if user.email else "user_campaign")
-
-    # Increment folder counter logic in Drive
-    query = f"name contains '{base_folder_name}_' and mimeType='application/vnd.google-apps.folder' and '{campaigns_folder_id}' in parents and trashed=false"
-    existing_campaigns = service.files().list(q=query, fields='files(name)').execute().get('files', [])
-
-    highest_counter = 0
-    for item in existing_campaigns:
-        try:
-            counter = int(item['name'].split('_')[-1])
-            if counter > highest_counter: highest_counter = counter
-        except ValueError:
-            continue
+            storage.upload_file(comp_filename, companies_folder_id, companies_file)
 
-    target_campaign_id = get_or_create_drive_folder(service, f"{base_folder_name}_{highest_counter + 1}", campaigns_folder_id)
+    # 2. Reserve the next campaign number for this user
+    campaigns_folder_id = storage.get_or_create_folder('campaigns', master_folder_id)
+    base_folder_name = get_campaign_base_name(user)
+    campaign_number = reserve_campaign_number(user, storage, campaigns_folder_id)
+    target_campaign_id = storage.get_or_create_folder(f"{base_folder_name}_{campaign_number}", campaigns_folder_id)
 
     # 3. Save New Campaign Files
     def upload_text(filename, content):
         if not content: return
-        file_obj = io.BytesIO(content.encode('utf-8'))
-        media = MediaIoBaseUpload(file_obj, mimetype='text/plain', resumable=False)
-        service.files().create(body={'name': filename, 'parents': [target_campaign_id]}, media_body=media).execute()
+        storage.upload_file(filename, target_campaign_id, io.BytesIO(content.encode('utf-8')), mimetype='text/plain')
 
     def upload_media(filename, file_obj):
         if not file_obj or not getattr(file_obj, 'name', None): return
         file_obj.seek(0)
         ctype, _ = mimetypes.guess_type(file_obj.name)
-        media = MediaIoBaseUpload(file_obj, mimetype=ctype or 'application/octet-stream', resumable=False)
-        service.files().create(body={'name': filename, 'parents': [target_campaign_id]}, media_body=media).execute()
+        storage.upload_file(filename, target_campaign_id, file_obj, mimetype=ctype or 'application/octet-stream')
 
     upload_text('subject.txt', subject)
     upload_text('coverletter.txt', cover_letter_text)
@@ -203,26 +349,30 @@ def save_campaign_records(user, companies_file, cover_letter_text, resume_pdf, a
             att_ext = os.path.splitext(att.name)[1]
             upload_media(f"attachment_{index}{att_ext}", att)
 
+    # Only point at the new folder once its files are in place
+    record_latest_campaign(user, storage, campaign_number, target_campaign_id)
     return target_campaign_id
 
-def get_latest_campaign_path(user):
-    """Returns the Google Drive Folder ID of the most recent campaign."""
+def get_latest_campaign_path(user, storage=None):
+    """Returns the storage folder id of the most recent campaign."""
     if not user.is_authenticated: return None
 
-    service = get_drive_service()
-    master_folder_id = settings.GOOGLE_DRIVE_FOLDER_ID
-    
-    query = f"name='campaigns' and mimeType='application/vnd.google-apps.folder' and '{master_folder_id}' in parents and trashed=false"
-    results = service.files().list(q=query, fields='files(id)').execute().get('files', [])
-    if not results: return None
-    campaigns_folder_id = results[0]['id']
+    from .storage import get_campaign_storage
+    storage = storage or get_campaign_storage(user=user)
+    return get_campaign_counter(user, storage).latest_folder_id or None
 
-    first = user.first_name.strip().lower() if user.first_name else ""
-    last = user.last_name.strip().lower() if user.last_name else ""
-    base_folder_name = f"{first}_{last}" if first and last else (user.email.split('@')[0].replace('.', '_') if user.email else "user_campaign")
+def scan_campaign_folders(user, storage, campaigns_folder_id=None):
+    """
+    Finds the user's highest-numbered campaign folder by listing them all.
+    Only used to seed a CampaignCounter for campaigns archived before the
+    counter existed. Returns (highest_number, folder_id).
+    """
+    if campaigns_folder_id is None:
+        campaigns_folder_id = storage.find_folder('campaigns', storage.root_id)
+        if not campaigns_folder_id: return 0, None
 
-    query = f"name contains '{base_folder_name}_' and mimeType='application/vnd.google-apps.folder' and '{campaigns_folder_id}' in parents and trashed=false"
-    existing_campaigns = service.files().list(q=query, fields='files(id, name)').execute().get('files', [])
+    base_folder_name = get_campaign_base_name(user)
+    existing_campaigns = storage.list_folder(campaigns_folder_id, name_contains=f"{base_folder_name}_", folders_only=True)
 
     highest_counter = 0
     latest_id = None
@@ -236,4 +386,47 @@ def get_latest_campaign_path(user):
         except ValueError:
             continue
 
-    return latest_id
\ No newline at end of file
+    return highest_counter, latest_id
+
+def get_campaign_counter(user, storage, campaigns_folder_id=None):
+    """The user's CampaignCounter for this storage backend, seeded from a folder scan on first use."""
+    from django.db import transaction, IntegrityError
+    from .models import CampaignCounter
+
+    counter = CampaignCounter.objects.filter(user=user, storage=storage.name).first()
+    if counter is not None:
+        return counter
+
+    highest, latest_id = scan_campaign_folders(user, storage, campaigns_folder_id)
+    try:
+        with transaction.atomic():
+            return CampaignCounter.objects.create(
+                user=user, storage=storage.name, last_number=highest,
+                latest_number=highest, latest_folder_id=latest_id or ""
+            )
+    except IntegrityError:
+        # Another request seeded it first
+        return CampaignCounter.objects.get(user=user, storage=storage.name)
+
+def reserve_campaign_number(user, storage, campaigns_folder_id=None):
+    """
+    Hands out the user's next campaign number. The UPDATE ... SET last_number
+    = last_number + 1 takes the row lock, so concurrent sends on any worker
+    or node get distinct numbers.
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from .models import CampaignCounter
+
+    get_campaign_counter(user, storage, campaigns_folder_id)
+    with transaction.atomic():
+        counters = CampaignCounter.objects.filter(user=user, storage=storage.name)
+        counters.update(last_number=F('last_number') + 1)
+        return counters.values_list('last_number', flat=True).get()
+
+def record_latest_campaign(user, storage, campaign_number, folder_id):
+    """Moves the latest-campaign pointer forward; an older campaign finishing late never moves it back."""
+    from .models import CampaignCounter
+    CampaignCounter.objects.filter(
+        user=user, storage=storage.name, latest_number__lt=campaign_number
+    ).update(latest_number=campaign_number, latest_folder_id=folder_id)
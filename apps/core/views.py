@@ -1,56 +1,53 @@
 import os
-import io
-import time
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.core.files.storage import FileSystemStorage
 from django.conf import settings
+from django.utils import timezone
 
 from .forms import ApplyForm
-from .utils import extract_leads, send_gmail_message, save_campaign_records, get_latest_campaign_path, get_drive_service, extract_text_from_document
-from googleapiclient.http import MediaIoBaseDownload
+from .models import SendProgress
+from .uploadhandlers import get_upload_errors
+from .staging import attach_staged_files, stage_request_files, StagingError
+from .utils import extract_leads, save_campaign_records, get_latest_campaign_path, extract_text_from_document, ExtractionLimitExceeded
+from .storage import get_campaign_storage, get_text_from_storage, get_file_from_storage
+from .sending import send_to_leads, link_campaign_files, append_links, attachment_number
+from .optimize import optimize_campaign_files
+from .templating import compile_campaign, TemplateError
+from .scheduler import SendWindow, plan_send_times, schedule_leads, consume_quota
+from .sandbox import extract_leads_sandboxed, guest_extraction_slot, ExtractionBusy
 
 ENABLE_EMAIL_SENDING = True
 
 def landing_view(request):
     return render(request, "core/landing.html")
 
-# --- Google Drive Download Helpers ---
-def get_text_from_drive(service, file_id):
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done: _, done = downloader.next_chunk()
-    return fh.getvalue().decode('utf-8')
-
-def get_file_from_drive(service, file_id, filename):
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done: _, done = downloader.next_chunk()
-    fh.seek(0)
-    fh.name = filename 
-    return fh
-# --------------------------------------
-
 def apply_view(request):
     if not request.user.is_authenticated:
         return redirect("core:landing")
 
-    latest_campaign = get_latest_campaign_path(request.user)
-    drive_service = get_drive_service() if latest_campaign else None
-    drive_files = {} 
+    storage = get_campaign_storage(user=request.user)
+    latest_campaign = get_latest_campaign_path(request.user, storage=storage)
+    campaign_files = {} 
     
-    if drive_service and latest_campaign:
-        query = f"'{latest_campaign}' in parents and trashed=false"
-        results = drive_service.files().list(q=query, fields="files(id, name)").execute()
-        for f in results.get('files', []):
-            drive_files[f['name']] = f['id']
+    if latest_campaign:
+        for f in storage.list_folder(latest_campaign):
+            campaign_files[f['name']] = f['id']
 
     if request.method == "POST":
         action = request.POST.get("action")
+
+        # Files refused mid-stream by the upload handlers never reach request.FILES
+        upload_errors = get_upload_errors(request)
+        if upload_errors:
+            return JsonResponse({"error": " ".join(upload_errors.values())}, status=400)
+
+        # Files are uploaded once; later actions post staged_<field> handles instead
+        try:
+            attach_staged_files(request)
+        except StagingError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        staged = stage_request_files(request)
         
         # ==========================================
         # AI INTERCEPTORS
@@ -64,14 +61,18 @@ def apply_view(request):
                 file_path = None
                 fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'temp'))
                 
+                staged_path = getattr(resume_pdf, 'staged_path', None)
+                
                 try:
-                    if resume_pdf:
+                    if staged_path:
+                        file_path = staged_path
+                    elif resume_pdf:
                         filename = fs.save(resume_pdf.name, resume_pdf)
                         file_path = fs.path(filename)
-                    elif drive_files:
-                        for name, f_id in drive_files.items():
+                    elif campaign_files:
+                        for name, f_id in campaign_files.items():
                             if name.startswith("resume"):
-                                opened_resume = get_file_from_drive(drive_service, f_id, name)
+                                opened_resume = get_file_from_storage(storage, f_id, name)
                                 filename = fs.get_available_name(name)
                                 file_path = fs.path(filename)
                                 with open(file_path, 'wb') as f:
@@ -87,12 +88,12 @@ def apply_view(request):
                     ai = ApplymaticAI()
                     generated_text = ai.generate_cover_letter(resume_text, include_company=include_company)
                     
-                    return JsonResponse({"status": "success", "cover_letter": generated_text})
+                    return JsonResponse({"status": "success", "cover_letter": generated_text, "staged": staged})
                     
                 except Exception as e:
                     return JsonResponse({"error": str(e)}, status=400)
                 finally:
-                    if file_path and os.path.exists(file_path):
+                    if file_path and file_path != staged_path and os.path.exists(file_path):
                         os.remove(file_path)
                         
             elif action == "refine_cover_letter":
@@ -121,8 +122,10 @@ def apply_view(request):
                 companies_file = request.FILES.get("companies_file")
                 manual_text = form.cleaned_data.get("manual_leads_text", "")
                 
-                file_path = None
-                if companies_file:
+                # A staged file is already on disk; only fresh uploads need a temp copy
+                staged_path = getattr(companies_file, 'staged_path', None)
+                file_path = staged_path
+                if companies_file and not file_path:
                     fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'temp'))
                     filename = fs.save(companies_file.name, companies_file)
                     file_path = fs.path(filename)
@@ -133,11 +136,11 @@ def apply_view(request):
                         return JsonResponse({"error": "Could not find any valid email addresses in the provided file/text."}, status=400)
                     
                     request.session['extracted_leads'] = leads 
-                    return JsonResponse({"count": len(leads), "leads": leads})
+                    return JsonResponse({"count": len(leads), "leads": leads, "staged": staged})
                 except ValueError as e:
                     return JsonResponse({"error": str(e)}, status=400)
                 finally:
-                    if file_path and os.path.exists(file_path):
+                    if file_path and file_path != staged_path and os.path.exists(file_path):
                         os.remove(file_path)
 
             elif action == "send":
@@ -145,58 +148,102 @@ def apply_view(request):
                 if not leads:
                     return JsonResponse({"error": "No leads found to send."}, status=400)
 
-                resume_pdf = request.FILES.get("resume_pdf")
-                opened_resume = None
-
-                if not resume_pdf and drive_files:
-                    for name, f_id in drive_files.items():
-                        if name.startswith("resume"):
-                            opened_resume = get_file_from_drive(drive_service, f_id, name)
-                            resume_pdf = opened_resume
-                            break
-
-                extra_attachments = request.FILES.getlist("attachments")
-                opened_attachments = []
-
-                if not extra_attachments and drive_files:
-                    for name, f_id in drive_files.items():
-                        if name.startswith("attachment_"):
-                            opened_attachments.append(get_file_from_drive(drive_service, f_id, name))
-                    extra_attachments = opened_attachments
-
                 cover_letter = form.cleaned_data.get("cover_letter")
                 subject = form.cleaned_data.get("subject")
                 companies_file = request.FILES.get("companies_file")
 
-                save_campaign_records(
-                    user=request.user, companies_file=companies_file,
-                    cover_letter_text=cover_letter, resume_pdf=resume_pdf,
-                    attachments=extra_attachments, subject=subject
-                )
+                # Catch placeholders no lead can fill before anything is archived or sent
+                try:
+                    compile_campaign(subject, cover_letter, leads)
+                except TemplateError as e:
+                    return JsonResponse({"error": str(e)}, status=400)
 
                 user_credentials = request.user.googleoauthprofile.get_credentials()
+                if ENABLE_EMAIL_SENDING and not user_credentials:
+                    return JsonResponse({"error": "Google OAuth credentials missing."}, status=403)
+
+                # Claimed before any slow work (Drive downloads, archiving): a retry while this
+                # send is still running would otherwise email everyone twice and plan quota twice
+                progress = SendProgress.claim(request.user, len(leads))
+                if progress is None:
+                    return JsonResponse({"error": "A campaign is already being sent. Please wait for it to finish."}, status=409)
+
                 sent_count = 0
+                failed_emails = []
+                deferred = []
+                attachment_savings = None
+                opened_resume = None
+                opened_attachments = []
 
-                for lead in leads:
-                    personalized_body = cover_letter.replace("{company_name}", lead["company_name"])
+                try:
+                    resume_pdf = request.FILES.get("resume_pdf")
+                    if not resume_pdf and campaign_files:
+                        for name, f_id in campaign_files.items():
+                            if name.startswith("resume"):
+                                opened_resume = get_file_from_storage(storage, f_id, name)
+                                resume_pdf = opened_resume
+                                break
+
+                    extra_attachments = request.FILES.getlist("attachments")
+                    if not extra_attachments and campaign_files:
+                        for name in sorted((name for name in campaign_files if name.startswith("attachment_")), key=attachment_number):
+                            opened_attachments.append(get_file_from_storage(storage, campaign_files[name], name))
+                        extra_attachments = opened_attachments
+
+                    campaign_folder_id = save_campaign_records(
+                        user=request.user, companies_file=companies_file,
+                        cover_letter_text=cover_letter, resume_pdf=resume_pdf,
+                        attachments=extra_attachments, subject=subject, storage=storage
+                    )
 
                     if ENABLE_EMAIL_SENDING:
-                        if not user_credentials:
-                            return JsonResponse({"error": "Google OAuth credentials missing."}, status=403)
-
-                        send_gmail_message(
-                            credentials=user_credentials, sender_email=request.user.email,
-                            to_email=lead["email"], subject=subject,
-                            body_text=personalized_body, resume_pdf=resume_pdf,
-                            attachments=extra_attachments
+                        # Optionally share the archived files once and mail links instead of N copies
+                        attachment_mode = form.get_attachment_mode()
+                        send_resume, send_attachments, links = link_campaign_files(
+                            storage, campaign_folder_id, resume_pdf, extra_attachments, attachment_mode
                         )
-                        sent_count += 1
-                        time.sleep(1)
+                        # Shrink what every email carries once, not per message; the archive keeps the originals
+                        optimize_attachments = form.cleaned_data.get("optimize_attachments")
+                        if optimize_attachments:
+                            send_resume, send_attachments, attachment_savings = optimize_campaign_files(send_resume, send_attachments)
+
+                        # Leads past today's Gmail quota (or outside the recipients' send window) are queued
+                        window_fields = form.get_send_window_fields()
+                        now = timezone.now()
+                        send_times = plan_send_times(request.user, len(leads), now=now, window=SendWindow.from_fields(**window_fields))
+                        due_now = [lead for lead, send_after in zip(leads, send_times) if send_after <= now]
+                        deferred = [(lead, send_after) for lead, send_after in zip(leads, send_times) if send_after > now]
+
+                        if deferred:
+                            schedule_leads(
+                                request.user, progress, [lead for lead, _ in deferred], [t for _, t in deferred],
+                                campaign_folder_id, subject, cover_letter, window_fields, attachment_mode,
+                                optimize_attachments
+                            )
+                        if due_now:
+                            # schedule_leads marked the row scheduled; it's sending until due_now is done
+                            progress.set_status(SendProgress.STATUS_SENDING)
+                            sent_count, failed_emails = send_to_leads(
+                                user_credentials, request.user.email, due_now, subject, append_links(cover_letter, links),
+                                resume_pdf=send_resume, attachments=send_attachments, progress=progress,
+                                on_group_sent=lambda sent, failed: consume_quota(request.user, len(sent))
+                            )
+                except Exception:
+                    progress.finish(SendProgress.STATUS_FAILED)
+                    raise
+                if deferred:
+                    progress.set_status(SendProgress.STATUS_SCHEDULED)
+                else:
+                    progress.finish()
 
                 if opened_resume: opened_resume.close()
                 for att in opened_attachments: att.close()
 
-                return JsonResponse({"status": "success", "sent_count": sent_count})
+                return JsonResponse({
+                    "status": "success", "sent_count": sent_count, "failed": failed_emails,
+                    "deferred_count": len(deferred), "next_send_at": deferred[0][1].isoformat() if deferred else None,
+                    "attachment_savings": attachment_savings
+                })
 
         return JsonResponse({"error": "Form validation failed."}, status=400)
 
@@ -205,12 +252,12 @@ def apply_view(request):
     previous_resume_name = None
     previous_attachments_count = 0
 
-    if drive_files:
-        if 'coverletter.txt' in drive_files:
-            initial_data['cover_letter'] = get_text_from_drive(drive_service, drive_files['coverletter.txt'])
-        if 'subject.txt' in drive_files:
-            initial_data['subject'] = get_text_from_drive(drive_service, drive_files['subject.txt'])
-        for name in drive_files.keys():
+    if campaign_files:
+        if 'coverletter.txt' in campaign_files:
+            initial_data['cover_letter'] = get_text_from_storage(storage, campaign_files['coverletter.txt'])
+        if 'subject.txt' in campaign_files:
+            initial_data['subject'] = get_text_from_storage(storage, campaign_files['subject.txt'])
+        for name in campaign_files.keys():
             if name.startswith("resume"): previous_resume_name = name
             elif name.startswith("attachment_"): previous_attachments_count += 1
 
@@ -222,9 +269,26 @@ def apply_view(request):
         "previous_resume_name": previous_resume_name, "previous_attachments_count": previous_attachments_count
     })
 
+def send_progress_view(request, progress_id=None):
+    """Cheap polling endpoint: reads one SendProgress counter row, never the leads."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Please sign in."}, status=401)
+
+    rows = SendProgress.objects.filter(user=request.user)
+    if progress_id is not None:
+        rows = rows.filter(pk=progress_id)
+    row = rows.order_by('-started_at').values(*SendProgress.POLL_FIELDS).first()
+    if not row:
+        return JsonResponse({"error": "No campaign send found."}, status=404)
+    return JsonResponse(SendProgress.to_payload(row))
+
 def guest_extract_view(request):
     if request.method == "POST":
         form = ApplyForm(request.POST, request.FILES)
+
+        upload_errors = get_upload_errors(request)
+        if upload_errors:
+            return JsonResponse({"error": " ".join(upload_errors.values())}, status=400)
         
         # Turn off all email requirements for testing
         form.fields['resume_pdf'].required = False
@@ -242,11 +306,17 @@ def guest_extract_view(request):
                 file_path = fs.path(filename)
 
             try:
-                leads = extract_leads(file_path=file_path, manual_text=manual_text)
+                # Guests are unauthenticated, so parsing runs in a resource-capped child process
+                with guest_extraction_slot(request):
+                    leads = extract_leads_sandboxed(file_path=file_path, manual_text=manual_text)
                 if not leads:
                     return JsonResponse({"error": "Could not find any valid email addresses in the provided file/text."}, status=400)
                 
                 return JsonResponse({"count": len(leads), "leads": leads})
+            except ExtractionBusy as e:
+                return JsonResponse({"error": str(e)}, status=429)
+            except ExtractionLimitExceeded as e:
+                return JsonResponse({"error": str(e)}, status=413)
             except ValueError as e:
                 return JsonResponse({"error": str(e)}, status=400)
             finally:
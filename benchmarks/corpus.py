@@ -0,0 +1,246 @@
+"""
+Deterministic synthetic lead files for the extraction benchmarks.
+
+    python benchmarks/corpus.py --out /tmp/corpus --formats pdf csv --emails 100 10000
+
+Every file of a given (format, emails, seed) is byte-for-byte the same on every
+run, so timings compare like with like. Each file holds exactly `emails` distinct
+addresses (compared case-insensitively) among directory-style filler text:
+
+- .csv / .xlsx: a Company, Email, Website, Contact Person table
+- .txt / .docx / .pdf: prose paragraphs with the contacts written inline;
+  the .docx also puts a third of them in a table, as real directories do
+
+Also exposes generate(fmt, emails, path, seed=0) for the benchmark scripts.
+"""
+import argparse
+import datetime
+import os
+import random
+import zlib
+
+FORMATS = ('txt', 'csv', 'xlsx', 'docx', 'pdf')
+FIXED_TIME = datetime.datetime(2024, 1, 1)
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+WORDS = (
+    "alpha", "apex", "blue", "bright", "cedar", "cloud", "crest", "delta", "echo", "field",
+    "forge", "green", "harbor", "iron", "jade", "key", "lake", "lumen", "maple", "nova",
+    "oak", "orbit", "pine", "prime", "quartz", "river", "rock", "sage", "silver", "stone",
+    "summit", "tide", "urban", "vector", "vista", "wave", "willow", "zen",
+)
+SUFFIXES = ("labs", "systems", "group", "works", "digital", "partners", "studio", "tech")
+TLDS = ("com", "io", "co.uk", "de", "org", "net", "com.au", "ai")
+LOCALS = ("hr", "jobs", "careers", "info", "hello", "talent", "recruiting", "{first}.{last}", "{first}")
+FIRST = ("sam", "alex", "noor", "maria", "li", "omar", "jane", "ravi", "yusuf", "eva", "tom", "aisha")
+LAST = ("khan", "smith", "garcia", "chen", "ali", "novak", "silva", "ito", "berg", "haddad")
+FILLER = (
+    "We are always interested in hearing from motivated graduates.",
+    "Our offices are open Monday to Friday, nine to five.",
+    "Applications are reviewed on a rolling basis throughout the year.",
+    "The company has grown steadily since it was founded.",
+    "Please mention the reference code of the role you are applying for.",
+    "Internships are available for students in their final year.",
+)
+
+
+def make_contacts(count, seed=0):
+    """Returns `count` contacts with distinct emails: dicts of company, email, website, person."""
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(count):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        company = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {rng.choice(SUFFIXES).title()}"
+        # The index keeps every domain, and so every email, unique
+        domain = f"{company.lower().replace(' ', '-')}-{i}.{rng.choice(TLDS)}"
+        local = rng.choice(LOCALS).format(first=first, last=last)
+        email = f"{local}@{domain}"
+        if rng.random() < 0.1:
+            # Some directories shout; the address is still the same lead
+            email = email.upper() if rng.random() < 0.5 else email.title()
+        contacts.append({
+            "company": company, "email": email, "website": f"https://www.{domain}/careers",
+            "person": f"{first.title()} {last.title()}",
+        })
+    return contacts
+
+
+def prose_lines(contacts, rng):
+    """Directory-style text: a filler sentence now and then, one contact per line."""
+    for i, contact in enumerate(contacts):
+        if i % 5 == 0:
+            yield rng.choice(FILLER)
+        yield f"{contact['company']} ({contact['website']}) - contact {contact['person']} at {contact['email']}."
+
+# ==========================================
+# Writers
+# ==========================================
+
+def write_txt(path, contacts, rng):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in prose_lines(contacts, rng):
+            f.write(line + "\n")
+
+
+def write_csv(path, contacts, rng):
+    import csv
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Company", "Email", "Website", "Contact Person"])
+        for c in contacts:
+            writer.writerow([c["company"], c["email"], c["website"], c["person"]])
+
+
+def write_xlsx(path, contacts, rng):
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    wb.properties.created = wb.properties.modified = FIXED_TIME
+    sheet = wb.create_sheet("Leads")
+    sheet.append(["Company", "Email", "Website", "Contact Person"])
+    for c in contacts:
+        sheet.append([c["company"], c["email"], c["website"], c["person"]])
+    wb.save(path)
+    _freeze_zip_timestamps(path)
+
+
+def write_docx(path, contacts, rng):
+    import docx
+    from copy import deepcopy
+
+    split = len(contacts) * 2 // 3
+    doc = docx.Document()
+    doc.add_heading("Employer Directory", level=1)
+
+    # python-docx looks for the section properties on every add_paragraph (quadratic for
+    # big documents) and fills tables cell by cell, so clone paragraphs and rows in the XML
+    body = doc.element.body
+    sect_pr = body[-1]
+    body.remove(sect_pr)
+    for line in prose_lines(contacts[:split], rng):
+        body.append(body.makeelement(W + "p"))
+        body[-1].append(body.makeelement(W + "r"))
+        body[-1][-1].append(body.makeelement(W + "t"))
+        body[-1][-1][-1].text = line
+    body.append(sect_pr)
+
+    table = doc.add_table(rows=1, cols=3)
+    header = table.rows[0].cells
+    header[0].text, header[1].text, header[2].text = "Company", "Email", "Website"
+    template = table.rows[0]._tr
+    for c in contacts[split:]:
+        tr = deepcopy(template)
+        texts = tr.iter(W + "t")
+        for node, value in zip(texts, (c["company"], c["email"], c["website"])):
+            node.text = value
+        table._tbl.append(tr)
+    doc.core_properties.created = doc.core_properties.modified = FIXED_TIME
+    doc.save(path)
+    _freeze_zip_timestamps(path)
+
+
+def write_pdf(path, contacts, rng, lines_per_page=60):
+    """A plain multi-page text PDF (Helvetica), written by hand so no PDF library is needed."""
+    lines = list(prose_lines(contacts, rng))
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for index, page_lines in enumerate(pages):
+        page_num, content_num = 4 + 2 * index, 5 + 2 * index
+        kids.append(f"{page_num} 0 R")
+        ops = ["BT", "/F1 8 Tf", "11 TL", "36 806 Td"]
+        ops += [f"({escape(line)}) Tj T*" for line in page_lines]
+        ops.append("ET")
+        stream = zlib.compress("\n".join(ops).encode("latin-1", "replace"))
+        objects[content_num] = (
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+        objects[page_num] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_num} 0 R >>"
+        ).encode()
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = {}
+        for num in sorted(objects):
+            offsets[num] = f.tell()
+            f.write(f"{num} 0 obj\n".encode() + objects[num] + b"\nendobj\n")
+        xref_at = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        for num in sorted(objects):
+            f.write(f"{offsets[num]:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode())
+
+
+def _freeze_zip_timestamps(path):
+    """
+    Rewrites a zip-based office file with fixed entry timestamps and document
+    dates (openpyxl stamps the save time), so output is reproducible.
+    """
+    import re
+    import zipfile
+    with zipfile.ZipFile(path) as src:
+        entries = [(info, src.read(info.filename)) for info in src.infolist()]
+    stamp = FIXED_TIME.strftime("%Y-%m-%dT%H:%M:%SZ").encode()
+    entries = [
+        (info, re.sub(rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*", rb"\g<1>" + stamp, data)
+         if info.filename == "docProps/core.xml" else data)
+        for info, data in entries
+    ]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info, data in entries:
+            frozen = zipfile.ZipInfo(info.filename, date_time=FIXED_TIME.timetuple()[:6])
+            frozen.compress_type = zipfile.ZIP_DEFLATED
+            dst.writestr(frozen, data)
+
+
+WRITERS = {"txt": write_txt, "csv": write_csv, "xlsx": write_xlsx, "docx": write_docx, "pdf": write_pdf}
+
+
+def generate(fmt, emails, path, seed=0):
+    """Writes a `fmt` lead file holding `emails` distinct addresses to `path`; returns the contacts."""
+    contacts = make_contacts(emails, seed)
+    WRITERS[fmt](path, contacts, random.Random(seed + 1))
+    return contacts
+
+
+def corpus_path(directory, fmt, emails, seed=0):
+    return os.path.join(directory, f"leads_{emails}_s{seed}.{fmt}")
+
+
+def ensure(directory, fmt, emails, seed=0):
+    """Generates the file unless an identical one (same name) is already cached in `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    path = corpus_path(directory, fmt, emails, seed)
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp." + fmt
+        generate(fmt, emails, tmp_path, seed)
+        os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--emails", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for emails in args.emails:
+        for fmt in args.formats:
+            path = ensure(args.out, fmt, emails, args.seed)
+            print(f"{path}  {os.path.getsize(path) / (1024 * 1024):.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
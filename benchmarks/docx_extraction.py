@@ -0,0 +1,105 @@
+"""
+Compares the streaming .docx extractor (apps.core.utils.iter_docx_text) with the
+old python-docx path on a generated directory-style document: a few paragraphs
+plus a large contacts table, which is where real directories keep their emails.
+
+    python benchmarks/docx_extraction.py                 # 2k and 20k table rows
+    python benchmarks/docx_extraction.py --rows 500 50000
+
+Reports wall time, peak Python memory (tracemalloc) and how many emails each
+path actually finds.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from apps.core.utils import iter_docx_text  # noqa: E402
+
+EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+
+def build_document(path, rows):
+    import docx
+    doc = docx.Document()
+    doc.sections[0].header.paragraphs[0].text = "Directory maintained by careers@directory-office.org"
+    doc.add_heading("Employer Directory", level=1)
+    for i in range(20):
+        doc.add_paragraph(f"Intro paragraph {i}, reach the editors at editor{i}@directory-office.org.")
+
+    # Building big tables cell-by-cell through python-docx is very slow, so fill the XML directly
+    table = doc.add_table(rows=1, cols=3)
+    header = table.rows[0].cells
+    header[0].text, header[1].text, header[2].text = "Company", "Email", "Website"
+    template = table.rows[0]._tr
+    from copy import deepcopy
+    for i in range(rows):
+        tr = deepcopy(template)
+        texts = tr.iter("{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t")
+        for node, value in zip(texts, (f"Company {i}", f"hr{i}@company{i}.com", f"company{i}.com")):
+            node.text = value
+        table._tbl.append(tr)
+    doc.save(path)
+
+
+def python_docx_paragraphs(path):
+    import docx
+    doc = docx.Document(path)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+
+def python_docx_with_tables(path):
+    import docx
+    doc = docx.Document(path)
+    lines = [para.text for para in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            lines.extend(cell.text for cell in row.cells)
+    return "\n".join(lines)
+
+
+def streaming(path):
+    return "\n".join(iter_docx_text(path))
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = func(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(set(EMAIL_RE.findall(text)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[2000, 20000])
+    args = parser.parse_args()
+
+    extractors = [
+        ("python-docx (paragraphs only, old)", python_docx_paragraphs),
+        ("python-docx (paragraphs + tables)", python_docx_with_tables),
+        ("streaming iter_docx_text", streaming),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"directory_{rows}.docx")
+            build_document(path, rows)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"\n{rows} table rows ({size_mb:.2f} MB .docx)")
+            print(f"  {'extractor':<38} {'time':>9} {'peak mem':>10} {'emails':>8}")
+            for label, func in extractors:
+                elapsed, peak, emails = measure(func, path)
+                print(f"  {label:<38} {elapsed * 1000:7.0f}ms {peak / (1024 * 1024):8.1f}MB {emails:>8}")
+
+
+if __name__ == '__main__':
+    main()
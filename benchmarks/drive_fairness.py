@@ -0,0 +1,127 @@
+"""
+Apply-page Drive reads while another user's campaigns upload in the
+background, against a fake Drive that slows down as more calls run at once
+and rate-limits (403 userRateLimitExceeded) past a concurrency ceiling.
+
+    python benchmarks/drive_fairness.py [--uploaders 24] [--reads 40] [--call-ms 50]
+
+Runs the same load with every call sent straight to the fake Drive, as
+before apps.core.fairshare, and through run_drive_call; reports the
+interactive read latency and how many calls failed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "applymatic.settings")
+
+import django  # noqa: E402
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from apps.core.fairshare import run_drive_call, INTERACTIVE, BACKGROUND  # noqa: E402
+
+# Concurrent calls the fake account accepts before answering 403 userRateLimitExceeded
+SERVER_LIMIT = 12
+
+
+class RateLimited(Exception):
+    resp = SimpleNamespace(status=403)
+    reason = "User Rate Limit Exceeded: userRateLimitExceeded"
+
+
+class FakeDrive:
+    """Each call takes call_seconds, plus 15% per call already in flight; refusals take call_seconds."""
+
+    def __init__(self, call_seconds):
+        self.call_seconds = call_seconds
+        self.inflight = 0
+        self.lock = threading.Lock()
+
+    def call(self):
+        with self.lock:
+            self.inflight += 1
+            inflight = self.inflight
+        try:
+            if inflight > SERVER_LIMIT:
+                time.sleep(self.call_seconds)  # A refusal still costs a round-trip
+                raise RateLimited()
+            time.sleep(self.call_seconds * (1 + 0.15 * (inflight - 1)))
+            return {}
+        finally:
+            with self.lock:
+                self.inflight -= 1
+
+
+def run_load(drive, scheduled, uploaders, reads):
+    stop = threading.Event()
+    failures = {"uploads": 0, "reads": 0}
+    latencies = []
+
+    def call(tenant, priority):
+        if scheduled:
+            return run_drive_call(drive.call, tenant=tenant, priority=priority)
+        return drive.call()
+
+    def uploader(tenant):
+        while not stop.is_set():
+            try:
+                call(tenant, BACKGROUND)
+            except RateLimited:
+                failures["uploads"] += 1
+
+    def reader():
+        for _ in range(reads):
+            start = time.perf_counter()
+            try:
+                call(1, INTERACTIVE)
+            except RateLimited:
+                failures["reads"] += 1
+            latencies.append(time.perf_counter() - start)
+            time.sleep(drive.call_seconds)  # Rendering between page loads
+
+    # Most uploads come from one heavy user, the rest from a few light ones
+    threads = [threading.Thread(target=uploader, args=(2 if i % 4 else 3 + i,)) for i in range(uploaders)]
+    for thread in threads:
+        thread.start()
+    time.sleep(drive.call_seconds * 4)  # Let the uploads saturate the account first
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    reader_thread.join()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    cache.clear()
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "failed_reads": failures["reads"],
+        "failed_uploads": failures["uploads"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploaders", type=int, default=24)
+    parser.add_argument("--reads", type=int, default=40)
+    parser.add_argument("--call-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    drive = FakeDrive(args.call_ms / 1000)
+    print(f"{args.uploaders} upload threads, {args.reads} apply-page reads, {args.call_ms:.0f} ms per call")
+    for name, scheduled in (("direct", False), ("fair-share", True)):
+        result = run_load(drive, scheduled, args.uploaders, args.reads)
+        print(f"  {name:<11} read p50 {result['p50'] * 1000:6.0f} ms  p95 {result['p95'] * 1000:6.0f} ms  "
+              f"failed reads {result['failed_reads']:3}  failed uploads {result['failed_uploads']:5}")
+
+
+if __name__ == "__main__":
+    main()
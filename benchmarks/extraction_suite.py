@@ -0,0 +1,150 @@
+"""
+Benchmarks lead extraction across formats and sizes on the synthetic corpus
+from corpus.py, and compares against the baseline kept in the repo.
+
+    python benchmarks/extraction_suite.py                      # compare with baselines/extraction.json
+    python benchmarks/extraction_suite.py --formats csv xlsx --emails 100000
+    python benchmarks/extraction_suite.py --save-baseline      # after an intended change
+
+For every (format, size) it runs two extractors:
+
+- text:  apps.core.utils.extract_text_from_document
+- leads: apps.core.utils.extract_leads (text scan or column-aware table path,
+         plus company/website inference per lead)
+
+and reports wall time (best of --repeat), input MB/s, emails/s, peak Python
+memory (tracemalloc, in a separate run since tracing slows things down) and
+how many of the file's distinct emails were found. With a baseline present it
+prints the time change and exits non-zero when a case slows down by more than
+--tolerance (and 10 ms) or finds a different number of emails.
+
+Generated files are cached in --corpus-dir (by format, size and seed), so only
+the first run pays for building them. PDFs above --pdf-max-emails are skipped
+by default: pdfplumber needs about 0.2 s and 12 MB per page.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+from apps.core.utils import extract_text_from_document, extract_leads  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "extraction.json")
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_REGRESSION_SECONDS = 0.01
+EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+
+def run_text(path):
+    text = extract_text_from_document(path)
+    return len({email.lower() for email in EMAIL_RE.findall(text)})
+
+
+def run_leads(path):
+    return len({lead["email"].lower() for lead in extract_leads(file_path=path)})
+
+
+EXTRACTORS = {"text": run_text, "leads": run_leads}
+
+
+def measure(func, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = func(path)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak, found
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("results", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", choices=corpus.FORMATS, default=list(corpus.FORMATS))
+    parser.add_argument("--emails", type=int, nargs="+", default=[100, 2000, 10000, 100000])
+    parser.add_argument("--extractors", nargs="+", choices=list(EXTRACTORS), default=list(EXTRACTORS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-max-emails", type=int, default=2000)
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "applymatic-corpus"))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    results = {}
+    regressions = []
+
+    header = f"{'case':<22} {'time':>9} {'MB/s':>8} {'emails/s':>11} {'peak':>9} {'found':>13}"
+    if baseline:
+        header += f" {'vs base':>9}"
+    print(header)
+
+    for emails in args.emails:
+        for fmt in args.formats:
+            if fmt == "pdf" and emails > args.pdf_max_emails:
+                continue
+            path = corpus.ensure(args.corpus_dir, fmt, emails, args.seed)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+
+            for name in args.extractors:
+                key = f"{fmt}/{emails}/{name}"
+                elapsed, peak, found = measure(EXTRACTORS[name], path, args.repeat)
+                results[key] = {
+                    "seconds": round(elapsed, 4), "peak_mb": round(peak / (1024 * 1024), 2),
+                    "found": found, "file_mb": round(size_mb, 3),
+                }
+
+                line = (f"{key:<22} {elapsed:8.3f}s {size_mb / elapsed:8.2f} {found / elapsed:11,.0f} "
+                        f"{peak / (1024 * 1024):7.1f}MB {found:>6}/{emails:<6}")
+                base = baseline.get(key)
+                if base:
+                    change = elapsed / base["seconds"] - 1
+                    line += f" {change:+8.0%}"
+                    if change > args.tolerance and elapsed - base["seconds"] > MIN_REGRESSION_SECONDS:
+                        regressions.append(f"{key}: {base['seconds']:.3f}s -> {elapsed:.3f}s")
+                    if found != base["found"]:
+                        regressions.append(f"{key}: found {base['found']} emails before, {found} now")
+                print(line)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        # Keep cases this run didn't cover (e.g. a --formats subset)
+        merged = {**load_baseline(args.baseline), **results}
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}",
+                "seed": args.seed, "repeat": args.repeat, "results": dict(sorted(merged.items())),
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nSaved {len(results)} results to {os.path.relpath(args.baseline, ROOT)}")
+    elif regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
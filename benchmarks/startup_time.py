@@ -0,0 +1,84 @@
+"""
+Measures web worker cold-start cost: Django setup + loading the URLconf (which
+imports every view), the same work a gunicorn worker does before its first request.
+
+    python benchmarks/startup_time.py            # 5 runs, summary + heavy modules
+    python benchmarks/startup_time.py --runs 10 --top 20
+
+Uses `python -X importtime` under the hood, so the numbers are per-module
+cumulative import times in milliseconds, taken from a fresh interpreter each run.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT_CODE = (
+    "import os, django;"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'applymatic.settings');"
+    "django.setup();"
+    "import applymatic.urls"
+)
+
+# Dependencies that should only load when a code path actually needs them
+HEAVY_MODULES = [
+    'pdfplumber', 'tldextract', 'googleapiclient.discovery', 'googleapiclient.http',
+    'google.oauth2.credentials', 'google.auth.transport.requests', 'openpyxl', 'docx', 'groq',
+]
+
+
+def run_once():
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_CODE],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumul_us, name = [part.strip() for part in line.replace('import time:', '|').split('|')]
+        cumulative[name] = int(cumul_us) / 1000
+    return wall_ms, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Show the N slowest top-level imports")
+    args = parser.parse_args()
+
+    walls, imports = [], {}
+    for _ in range(args.runs):
+        wall_ms, cumulative = run_once()
+        walls.append(wall_ms)
+        for name, ms in cumulative.items():
+            imports.setdefault(name, []).append(ms)
+
+    print(f"Worker boot (django.setup + URLconf), {args.runs} runs")
+    print(f"  wall time   median {statistics.median(walls):8.1f} ms   min {min(walls):8.1f} ms")
+
+    print("\nHeavy dependencies loaded at boot (median cumulative ms):")
+    loaded = [(name, statistics.median(imports[name])) for name in HEAVY_MODULES if name in imports]
+    if not loaded:
+        print("  none")
+    for name, ms in loaded:
+        print(f"  {name:<35} {ms:8.1f}")
+
+    print(f"\nSlowest {args.top} imports (median cumulative ms):")
+    slowest = sorted(((statistics.median(v), k) for k, v in imports.items()), reverse=True)[:args.top]
+    for ms, name in slowest:
+        print(f"  {name:<35} {ms:8.1f}")
+
+
+if __name__ == '__main__':
+    main()